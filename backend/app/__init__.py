@@ -1,10 +1,11 @@
 import os
-from flask import Flask, jsonify, send_from_directory
+from flask import Flask, jsonify
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
 from flask_jwt_extended import JWTManager
 from flask_cors import CORS
 from flask_bcrypt import Bcrypt
+from werkzeug.middleware.proxy_fix import ProxyFix
 from config import Config
 
 # Initialize extensions
@@ -21,7 +22,6 @@ def create_app(config_class=Config):
     project_root = os.path.dirname(backend_dir)
     
     frontend_dir = os.path.join(project_root, 'src')
-    image_dir = os.path.join(project_root, 'images')
 
     # Initialize Flask with the frontend directory as the static folder
     app = Flask(__name__, 
@@ -29,6 +29,12 @@ def create_app(config_class=Config):
                 static_url_path='')
     
     app.config.from_object(config_class)
+
+    # Behind a reverse proxy, take the client address from the hops we trust so
+    # per-IP rate limits do not put every client in the proxy's bucket
+    if app.config['TRUSTED_PROXY_HOPS']:
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=app.config['TRUSTED_PROXY_HOPS'],
+                                x_proto=app.config['TRUSTED_PROXY_HOPS'])
     
     # Init extensions
     db.init_app(app)
@@ -37,10 +43,26 @@ def create_app(config_class=Config):
     bcrypt.init_app(app)
     cors.init_app(app)
 
+    from app.compression import compressor
+    from app.passwords import password_pool
+    from app.query_stats import query_stats
+    from app.ratelimit import rate_limiter
+    password_pool.init_app(app)
+    rate_limiter.init_app(app)
+    compressor.init_app(app)
+    query_stats.init_app(app)
+
+    from app.assets import send_asset, send_frontend_file
+    from app.images import send_image
+
     # 🔹 Route to serve the main website (index.html)
     @app.route("/")
     def index():
-        return send_from_directory(app.static_folder, 'index.html')
+        return send_frontend_file('index.html')
+
+    # Pages come from the asset build (fingerprinted references) once `flask build-assets` has run
+    app.view_functions['static'] = send_frontend_file
+    app.add_url_rule('/assets/<path:filename>', 'assets', send_asset)
 
     # 🔹 Root health check route (moved to /api/health)
     @app.route("/api/health")
@@ -50,10 +72,13 @@ def create_app(config_class=Config):
             "message": "Backend API is running"
         }), 200
 
-    # 🔹 Route to serve images from the root 'images' folder
+    # 🔹 Route to serve images (IMAGE_DIR), resized / re-encoded with ?w=&h=&format=
     @app.route('/images/<path:filename>')
     def serve_images(filename):
-        return send_from_directory(image_dir, filename)
+        return send_image(app.config['IMAGE_DIR'], filename)
+
+    # JWT current-user loader and its identity cache
+    from app import identity  # noqa: F401
 
     # Register Blueprints
     from app.routes.auth import bp as auth_bp
@@ -61,11 +86,31 @@ def create_app(config_class=Config):
     from app.routes.orders import bp as orders_bp
 
     from app.routes.users import bp as users_bp
+    from app.routes.reservations import bp as reservations_bp
+    from app.routes.analytics import bp as analytics_bp
+    from app.routes.inventory import bp as inventory_bp
+    from app.routes.events import bp as events_bp
     
     app.register_blueprint(auth_bp, url_prefix='/api/auth')
     app.register_blueprint(products_bp, url_prefix='/api/products')
     app.register_blueprint(orders_bp, url_prefix='/api/orders')
     app.register_blueprint(users_bp, url_prefix='/api/users')
+    app.register_blueprint(reservations_bp, url_prefix='/api/reservations')
+    app.register_blueprint(analytics_bp, url_prefix='/api/analytics')
+    app.register_blueprint(inventory_bp, url_prefix='/api/inventory')
+    app.register_blueprint(events_bp, url_prefix='/api/events')
+
+    # CLI maintenance commands
+    from app.assets import build_assets_command
+    from app.idempotency import purge_idempotency_keys_command
+    from app.ledger import snapshot_stock_command
+    from app.reservations import sweep_reservations_command
+    from app.sales import rebuild_sales_rollups_command
+    app.cli.add_command(purge_idempotency_keys_command)
+    app.cli.add_command(sweep_reservations_command)
+    app.cli.add_command(rebuild_sales_rollups_command)
+    app.cli.add_command(snapshot_stock_command)
+    app.cli.add_command(build_assets_command)
 
     return app
 
@@ -0,0 +1,164 @@
+"""Fingerprinted, precompressed frontend assets (built with `flask build-assets`)"""
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import re
+import shutil
+from urllib.parse import urljoin
+
+import click
+from flask import current_app, request, send_from_directory
+from werkzeug.security import safe_join
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip variants are always built
+    brotli = None
+
+# Directories under src/ whose files get content-hashed names
+ASSET_DIRS = ('scripts', 'styles', 'images')
+URL_PREFIX = '/assets/'
+COMPRESSIBLE = {'.css', '.js', '.svg', '.html', '.json', '.txt', '.xml'}
+ONE_YEAR = 365 * 24 * 3600
+
+# A quoted or url(...) reference to an asset, as found in HTML, CSS and JS
+REF_RE = re.compile(r'''(?P<open>["'(])(?P<ref>[^"'()\s]+?\.(?:js|css|png|jpe?g|gif|svg|webp|ico|woff2?))(?=[?#"')])''')
+
+# Best first; each is (Accept-Encoding token, file suffix)
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+
+def fingerprint(rel_path, data):
+    name, ext = os.path.splitext(rel_path)
+    return f'{name}.{hashlib.sha256(data).hexdigest()[:12]}{ext}'
+
+
+def rewrite_refs(text, base, manifest):
+    """
+    Point references to built assets at their fingerprinted URLs. `base` is the path
+    references are relative to: the file itself for CSS, the site root for pages and
+    scripts (whose URLs resolve against the page).
+    """
+    def replace(match):
+        ref = match.group('ref')
+        if ref.startswith(('//', 'data:')) or '://' in ref:
+            return match.group(0)
+        target = manifest.get(urljoin('/' + base, ref).lstrip('/'))
+        return match.group('open') + URL_PREFIX + target if target else match.group(0)
+
+    return REF_RE.sub(replace, text)
+
+
+def write_variants(path, data):
+    """Write the file plus .gz/.br siblings when they are worth serving"""
+    with open(path, 'wb') as f:
+        f.write(data)
+    if os.path.splitext(path)[1] not in COMPRESSIBLE:
+        return
+    variants = [('.gz', gzip.compress(data, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        variants.append(('.br', brotli.compress(data, quality=11)))
+    for suffix, compressed in variants:
+        if len(compressed) < len(data) * 0.9:
+            with open(path + suffix, 'wb') as f:
+                f.write(compressed)
+
+
+def build(src_dir, build_dir):
+    """
+    Build into `build_dir`:
+      assets/   every file of ASSET_DIRS under a content-hashed name, with variants
+      pages/    the site's HTML pages with references rewritten, with variants
+      manifest.json  original path -> fingerprinted path
+    The new build is assembled next to the old one and swapped in at the end.
+    Returns the manifest.
+    """
+    staging = build_dir.rstrip(os.sep) + '.tmp'
+    shutil.rmtree(staging, ignore_errors=True)
+    os.makedirs(os.path.join(staging, 'assets'))
+    os.makedirs(os.path.join(staging, 'pages'))
+
+    files = []
+    for asset_dir in ASSET_DIRS:
+        for root, _, names in os.walk(os.path.join(src_dir, asset_dir)):
+            for name in sorted(names):
+                path = os.path.join(root, name)
+                files.append(os.path.relpath(path, src_dir).replace(os.sep, '/'))
+
+    # Binary files first so stylesheets and scripts can be rewritten to point at them
+    texts = {'.css', '.js'}
+    manifest = {}
+    for rel_path in sorted(files, key=lambda p: os.path.splitext(p)[1] in texts):
+        with open(os.path.join(src_dir, rel_path), 'rb') as f:
+            data = f.read()
+        ext = os.path.splitext(rel_path)[1]
+        if ext in texts:
+            base = rel_path if ext == '.css' else ''
+            data = rewrite_refs(data.decode('utf-8'), base, manifest).encode('utf-8')
+        manifest[rel_path] = fingerprint(rel_path, data)
+        target = os.path.join(staging, 'assets', manifest[rel_path])
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        write_variants(target, data)
+
+    for name in sorted(os.listdir(src_dir)):
+        if name.endswith('.html'):
+            with open(os.path.join(src_dir, name), encoding='utf-8') as f:
+                page = rewrite_refs(f.read(), '', manifest)
+            write_variants(os.path.join(staging, 'pages', name), page.encode('utf-8'))
+
+    with open(os.path.join(staging, 'manifest.json'), 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+
+    previous = build_dir.rstrip(os.sep) + '.old'
+    shutil.rmtree(previous, ignore_errors=True)
+    if os.path.isdir(build_dir):
+        os.rename(build_dir, previous)
+    os.rename(staging, build_dir)
+    shutil.rmtree(previous, ignore_errors=True)
+    return manifest
+
+
+def send_precompressed(directory, filename, immutable=False):
+    """Send a built file, picking the best precompressed variant the client accepts"""
+    mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    # The name of an immutable file changes whenever its content does
+    max_age = ONE_YEAR if immutable else None
+    for encoding, suffix in ENCODINGS:
+        path = safe_join(directory, filename + suffix)
+        if request.accept_encodings[encoding] and path and os.path.isfile(path):
+            response = send_from_directory(directory, filename + suffix, mimetype=mimetype, max_age=max_age)
+            response.headers['Content-Encoding'] = encoding
+            break
+    else:
+        response = send_from_directory(directory, filename, mimetype=mimetype, max_age=max_age)
+    response.vary.add('Accept-Encoding')
+    if immutable:
+        response.cache_control.immutable = True
+    return response
+
+
+def send_asset(filename):
+    """GET /assets/<fingerprinted path>"""
+    assets = os.path.join(current_app.config['ASSETS_BUILD_DIR'], 'assets')
+    return send_precompressed(assets, filename, immutable=True)
+
+
+def send_frontend_file(filename):
+    """Static view for src/: pages come from the asset build when there is one"""
+    if filename.endswith('.html'):
+        pages = os.path.join(current_app.config['ASSETS_BUILD_DIR'], 'pages')
+        path = safe_join(pages, filename)
+        if path and os.path.isfile(path):
+            return send_precompressed(pages, filename)
+    return current_app.send_static_file(filename)
+
+
+@click.command('build-assets')
+def build_assets_command():
+    """Fingerprint and precompress the frontend assets and rewrite the pages to use them."""
+    build_dir = current_app.config['ASSETS_BUILD_DIR']
+    manifest = build(current_app.static_folder, build_dir)
+    click.echo(f'Built {len(manifest)} assets into {build_dir}'
+               f'{"" if brotli else " (brotli not installed: gzip only)"}.')
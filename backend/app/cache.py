@@ -0,0 +1,81 @@
+"""Versioned in-process response cache for the product catalog"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from flask import Response, current_app, make_response, request
+
+
+class CatalogCache:
+    """
+    Serialized catalog responses keyed by request path + query string.
+
+    Every write that changes what a catalog endpoint would return calls bump(), which
+    moves the version on and drops every entry. The version is per process, so entries
+    also expire after CATALOG_CACHE_TTL seconds to bound staleness across workers.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = 0
+        self._entries = OrderedDict()  # key -> (version, expires_at, body, mimetype, etag)
+
+    @property
+    def version(self):
+        return self._version
+
+    def bump(self):
+        with self._lock:
+            self._version += 1
+            self._entries.clear()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] != self._version or entry[1] < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key, version, body, mimetype):
+        etag = hashlib.sha1(body).hexdigest()
+        entry = (version, time.monotonic() + current_app.config['CATALOG_CACHE_TTL'], body, mimetype, etag)
+        with self._lock:
+            # A write may have landed while the response was being built
+            if version == self._version:
+                self._entries[key] = entry
+                self._entries.move_to_end(key)
+                while len(self._entries) > current_app.config['CATALOG_CACHE_SIZE']:
+                    self._entries.popitem(last=False)
+        return entry
+
+
+catalog_cache = CatalogCache()
+
+
+def cached_catalog_response(view):
+    """Serve a catalog GET from the cache, with a strong ETag and 304 on If-None-Match"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        key = request.full_path
+        entry = catalog_cache.get(key)
+
+        if entry is None:
+            version = catalog_cache.version
+            response = make_response(view(*args, **kwargs))
+            if response.status_code != 200:
+                return response
+            entry = catalog_cache.put(key, version, response.get_data(), response.mimetype)
+
+        _, _, body, mimetype, etag = entry
+        response = Response(body, mimetype=mimetype)
+        response.set_etag(etag)
+        response.cache_control.no_cache = True  # always revalidate, which is a cheap 304
+        return response.make_conditional(request)
+
+    return wrapper
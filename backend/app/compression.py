@@ -0,0 +1,130 @@
+"""gzip / brotli compression of text responses, negotiated from Accept-Encoding"""
+import gzip
+import itertools
+import zlib
+
+from flask import current_app, request
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip is always available
+    brotli = None
+
+
+class _GzipStream:
+    def __init__(self, level):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)  # 31: gzip container
+
+    def compress(self, data):
+        # Sync-flush every chunk so a streamed response keeps arriving as it is produced
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self._compressor.flush()
+
+
+class _BrotliStream:
+    def __init__(self, quality):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data):
+        return self._compressor.process(data) + self._compressor.flush()
+
+    def finish(self):
+        return self._compressor.finish()
+
+
+class Compressor:
+    """
+    Compresses text responses (COMPRESS_MIMETYPES) in an after_request hook.
+
+    Bodies under COMPRESS_MIN_SIZE go out as they are. Streamed responses (generators
+    such as the order export) are read until that many bytes arrive, then compressed
+    chunk by chunk without further buffering; one that ends sooner is sent as it is.
+    Left alone: responses that already have a Content-Encoding, files from
+    send_file (the asset build precompresses those), partial content, no-transform,
+    and Server-Sent Events, whose mimetype is not listed and which must not be delayed.
+    """
+
+    def init_app(self, app):
+        app.after_request(self.compress)
+
+    def _choose(self):
+        accepted = request.accept_encodings
+        if brotli is not None and accepted['br']:
+            return 'br'
+        if accepted['gzip']:
+            return 'gzip'
+        return None
+
+    def compress(self, response):
+        config = current_app.config
+        if (not config['COMPRESS_ENABLED']
+                or response.mimetype not in config['COMPRESS_MIMETYPES']
+                or 'Content-Encoding' in response.headers
+                or response.direct_passthrough
+                or response.status_code < 200 or response.status_code in (204, 206, 304)
+                or response.cache_control.no_transform):
+            return response
+
+        response.vary.add('Accept-Encoding')
+        encoding = self._choose()
+        if encoding is None:
+            return response
+
+        if response.is_streamed:
+            if response.content_length is not None and response.content_length < config['COMPRESS_MIN_SIZE']:
+                return response
+            original = response.response
+            chunks = response.iter_encoded()
+            head, ended = self._peek(chunks, config['COMPRESS_MIN_SIZE'])
+            if ended:
+                # The whole body turned out smaller than the threshold: send it as it is
+                response.set_data(b''.join(head))
+                if hasattr(original, 'close'):
+                    original.close()
+                return response
+            stream = _BrotliStream(config['COMPRESS_BR_LEVEL']) if encoding == 'br' \
+                else _GzipStream(config['COMPRESS_LEVEL'])
+            response.response = self._stream(itertools.chain(head, chunks), stream)
+            if hasattr(original, 'close'):
+                # Closing the wrapper alone would skip a generator that never started
+                response.call_on_close(original.close)
+            response.headers.pop('Content-Length', None)
+        else:
+            data = response.get_data()
+            if len(data) < config['COMPRESS_MIN_SIZE']:
+                return response
+            if encoding == 'br':
+                response.set_data(brotli.compress(data, quality=config['COMPRESS_BR_LEVEL']))
+            else:
+                response.set_data(gzip.compress(data, compresslevel=config['COMPRESS_LEVEL'], mtime=0))
+
+        response.headers['Content-Encoding'] = encoding
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            # Still a match for If-None-Match (weak comparison), no longer claims byte equality
+            response.set_etag(etag, weak=True)
+        return response
+
+    @staticmethod
+    def _peek(chunks, size):
+        """Pull chunks until `size` bytes have arrived; returns (chunks, whether the body ended)"""
+        head = []
+        for chunk in chunks:
+            head.append(chunk)
+            size -= len(chunk)
+            if size <= 0:
+                return head, False
+        return head, True
+
+    @staticmethod
+    def _stream(chunks, stream):
+        for chunk in chunks:
+            compressed = stream.compress(chunk)
+            if compressed:
+                yield compressed
+        yield stream.finish()
+
+
+compressor = Compressor()
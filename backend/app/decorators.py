@@ -0,0 +1,42 @@
+"""Authorization decorators shared by the blueprints"""
+from functools import wraps
+
+from flask import jsonify
+from flask_jwt_extended import get_jwt, get_jwt_identity, jwt_required
+
+from app import db
+from app.models import User
+
+
+def access_claims(user):
+    """Signed claims added to every access token at login"""
+    return {
+        'is_admin': bool(user.is_admin),
+        'tv': user.token_version or 0,
+    }
+
+
+def admin_required(view):
+    """
+    Require a valid JWT whose claims mark the user as admin.
+
+    The role travels in the signed token. The token version is compared with the
+    user's current one, which create_admin.py and other role changes bump to revoke
+    previously issued tokens. It is read fresh on every admin request (a single-column
+    primary key lookup) rather than from the identity cache, so a revoked token stops
+    working on every worker at once instead of after IDENTITY_CACHE_TTL.
+    """
+    @wraps(view)
+    @jwt_required()
+    def wrapper(*args, **kwargs):
+        claims = get_jwt()
+        if not claims.get('is_admin'):
+            return jsonify({'message': 'Admin access required'}), 403
+
+        current = db.session.query(User.token_version).filter_by(id=int(get_jwt_identity())).first()
+        if current is None or (current.token_version or 0) != claims.get('tv'):
+            return jsonify({'message': 'Token has been revoked, please log in again'}), 401
+
+        return view(*args, **kwargs)
+
+    return wrapper
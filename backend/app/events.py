@@ -0,0 +1,185 @@
+"""In-process pub/sub behind the Server-Sent Events stream"""
+import json
+import secrets
+import threading
+import time
+from collections import deque
+
+from flask import current_app
+
+from app import db
+from app.models import Product
+
+
+class Subscription:
+    """
+    One SSE client: a bounded buffer of pending events plus what it may see.
+
+    If the client falls more than SSE_CLIENT_BUFFER events behind, the buffer is
+    dropped and the client is told to refetch instead of slowing down publishers.
+    """
+
+    def __init__(self, user_id, is_admin, buffer_size):
+        self.user_id = user_id
+        self.is_admin = is_admin
+        self.buffer_size = buffer_size
+        self.pending = deque()
+        self.overflowed = False
+        self.ready = threading.Condition()
+
+    def can_see(self, event):
+        audience = event[3]
+        return audience is None or self.is_admin or audience == self.user_id
+
+    def push(self, event):
+        with self.ready:
+            if len(self.pending) >= self.buffer_size:
+                self.pending.clear()
+                self.overflowed = True
+            else:
+                self.pending.append(event)
+            self.ready.notify()
+
+    def wait(self, timeout):
+        """Return (overflowed, events) once something arrives or the timeout passes"""
+        with self.ready:
+            if not self.pending and not self.overflowed:
+                self.ready.wait(timeout)
+            events = list(self.pending)
+            self.pending.clear()
+            overflowed, self.overflowed = self.overflowed, False
+        return overflowed, events
+
+
+class EventBroker:
+    """
+    Fans committed changes out to every subscriber in this process.
+
+    Events are numbered "<epoch>-<n>" and the last SSE_HISTORY of them are kept, so
+    a reconnecting client sending Last-Event-ID gets exactly what it missed. A cursor
+    from another process or restart, or older than the history, gets a reset instead.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = set()
+        self._history = deque()  # (n, event_type, payload, audience)
+        self._epoch = secrets.token_hex(4)
+        self._next = 1
+        self._floor = 1  # every event from here on is still in the history
+
+    def publish(self, event_type, data, audience=None):
+        """
+        Publish after the change commits. `data` may be a callable, which is only
+        evaluated when someone is listening; `audience` limits an event to one user
+        (and admins).
+        """
+        with self._lock:
+            listening = bool(self._subscribers)
+        payload = json.dumps(data() if callable(data) else data) if listening else None
+
+        with self._lock:
+            n = self._next
+            self._next += 1
+            if payload is None or not self._subscribers:
+                # Nobody could receive it, so earlier cursors can no longer resume
+                self._history.clear()
+                self._floor = self._next
+                return
+            # Numbered, recorded and delivered under one lock so every client sees the same order
+            event = (n, event_type, payload, audience)
+            self._history.append(event)
+            while len(self._history) > current_app.config['SSE_HISTORY']:
+                self._floor = self._history.popleft()[0] + 1
+            for subscription in self._subscribers:
+                if subscription.can_see(event):
+                    subscription.push(event)
+
+    def subscribe(self, user_id, is_admin, last_event_id=None):
+        """
+        Register a client and return (subscription, backlog). backlog is None when the
+        cursor cannot be honoured and the client must refetch; otherwise it holds the
+        events after the cursor.
+        """
+        subscription = Subscription(user_id, is_admin, current_app.config['SSE_CLIENT_BUFFER'])
+        with self._lock:
+            if len(self._subscribers) >= current_app.config['SSE_MAX_CLIENTS']:
+                return None, None
+            self._subscribers.add(subscription)
+            if not last_event_id:
+                return subscription, []
+            epoch, _, n = last_event_id.partition('-')
+            if epoch != self._epoch or not n.isdigit() or int(n) + 1 < self._floor:
+                return subscription, None
+            backlog = [e for e in self._history if e[0] > int(n) and subscription.can_see(e)]
+        return subscription, backlog
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def reset(self):
+        """Tell a client to refetch; its cursor moves to the latest event"""
+        with self._lock:
+            n = self._next - 1
+        return f'id: {self._epoch}-{n}\nevent: reset\ndata: {{}}\n\n'
+
+    def format(self, event):
+        n, event_type, payload, _ = event
+        return f'id: {self._epoch}-{n}\nevent: {event_type}\ndata: {payload}\n\n'
+
+
+broker = EventBroker()
+
+
+class StreamTickets:
+    """
+    Single-use tickets that open the SSE stream for a signed-in user.
+
+    EventSource cannot send an Authorization header, and a JWT in the URL ends up in
+    proxy and access logs. A ticket is issued by an authenticated POST, names the
+    user it was issued to, and expires after SSE_TICKET_TTL seconds or its first use.
+    Tickets are per process, like the stream itself.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._tickets = {}  # ticket -> (expires, user_id, is_admin)
+
+    def issue(self, user_id, is_admin):
+        ticket = secrets.token_urlsafe(24)
+        now = time.monotonic()
+        with self._lock:
+            for stale in [t for t, (expires, _, _) in self._tickets.items() if expires <= now]:
+                del self._tickets[stale]
+            self._tickets[ticket] = (now + current_app.config['SSE_TICKET_TTL'], user_id, is_admin)
+        return ticket
+
+    def redeem(self, ticket):
+        """Return (user_id, is_admin) for a live ticket, consuming it, or None"""
+        with self._lock:
+            entry = self._tickets.pop(ticket, None)
+        if entry is None or entry[0] <= time.monotonic():
+            return None
+        return entry[1], entry[2]
+
+
+tickets = StreamTickets()
+
+
+def publish_stock(product_ids):
+    """Publish the current stock figures of these products"""
+    ids = sorted(set(product_ids))
+    if not ids:
+        return
+    broker.publish('stock', lambda: [
+        {'product_id': product_id, 'stock': stock, 'reserved': reserved,
+         'available': max((stock or 0) - (reserved or 0), 0), 'availability': availability}
+        for product_id, stock, reserved, availability in db.session.query(
+            Product.id, Product.stock, Product.reserved, Product.availability
+        ).filter(Product.id.in_(ids))
+    ])
+
+
+def publish_order(order_id, user_id, status):
+    broker.publish('order', {'order_id': order_id, 'user_id': user_id, 'status': status}, audience=user_id)
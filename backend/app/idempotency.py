@@ -0,0 +1,67 @@
+"""Idempotency-Key handling for order creation"""
+import json
+from datetime import datetime, timedelta
+
+import click
+from flask import Response, current_app
+
+from app import db
+from app.models import IdempotencyKey
+
+HEADER = 'Idempotency-Key'
+MAX_KEY_LENGTH = 255
+
+
+def _cutoff():
+    return datetime.utcnow() - timedelta(seconds=current_app.config['IDEMPOTENCY_KEY_TTL'])
+
+
+def find_response(user_id, key):
+    """Return the stored record for this user's key, or None if unknown or expired"""
+    record = IdempotencyKey.query.filter_by(user_id=user_id, key=key).first()
+    if record is None:
+        return None
+    if record.created_at < _cutoff():
+        # Expired: free the key so this request can claim it in its own transaction
+        db.session.delete(record)
+        db.session.flush()
+        return None
+    return record
+
+
+def remember_response(user_id, key, order_id, status_code, body):
+    """Stage the response in the caller's transaction, so it commits together with the order"""
+    db.session.add(IdempotencyKey(
+        key=key,
+        user_id=user_id,
+        order_id=order_id,
+        status_code=status_code,
+        response_body=json.dumps(body)
+    ))
+
+
+def replay(record):
+    response = Response(record.response_body, status=record.status_code, mimetype='application/json')
+    response.headers['Idempotent-Replayed'] = 'true'
+    return response
+
+
+def purge_expired(batch_size=1000):
+    """Delete expired keys in batches; returns how many rows went"""
+    cutoff = _cutoff()
+    purged = 0
+    while True:
+        ids = [row.id for row in db.session.query(IdempotencyKey.id)
+               .filter(IdempotencyKey.created_at < cutoff).limit(batch_size)]
+        if not ids:
+            return purged
+        IdempotencyKey.query.filter(IdempotencyKey.id.in_(ids)).delete(synchronize_session=False)
+        db.session.commit()
+        purged += len(ids)
+
+
+@click.command('purge-idempotency-keys')
+@click.option('--batch-size', default=1000, show_default=True)
+def purge_idempotency_keys_command(batch_size):
+    """Delete Idempotency-Key records older than IDEMPOTENCY_KEY_TTL."""
+    click.echo(f'Purged {purge_expired(batch_size)} expired idempotency keys.')
@@ -0,0 +1,117 @@
+"""Current-user resolution for JWT-protected routes, with a bounded cross-request cache"""
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app import db, jwt
+from app.models import User
+
+
+class CurrentUser:
+    """Read-only snapshot of a User row, safe to share between requests and threads"""
+    __slots__ = ('id', 'is_admin', 'token_version', '_data')
+
+    def __init__(self, user):
+        self.id = user.id
+        self.is_admin = bool(user.is_admin)
+        self.token_version = user.token_version or 0
+        self._data = user.to_dict()
+
+    def to_dict(self):
+        return dict(self._data)
+
+
+class IdentityCache:
+    """LRU of CurrentUser snapshots by id, each valid for IDENTITY_CACHE_TTL seconds"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # user_id -> (expires_at, CurrentUser)
+
+    def get(self, user_id):
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            if entry[0] < time.monotonic():
+                del self._entries[user_id]
+                return None
+            self._entries.move_to_end(user_id)
+            return entry[1]
+
+    def put(self, user):
+        expires_at = time.monotonic() + current_app.config['IDENTITY_CACHE_TTL']
+        with self._lock:
+            self._entries[user.id] = (expires_at, user)
+            self._entries.move_to_end(user.id)
+            while len(self._entries) > current_app.config['IDENTITY_CACHE_SIZE']:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+identity_cache = IdentityCache()
+
+
+@jwt.user_lookup_loader
+def load_current_user(_jwt_header, jwt_data):
+    """
+    Resolve the token's user for flask_jwt_extended.current_user.
+
+    flask_jwt_extended calls this once per request and keeps the result on flask.g,
+    so a request costs at most one User query, and none while the snapshot is cached.
+    """
+    user_id = int(jwt_data[current_app.config['JWT_IDENTITY_CLAIM']])
+    cached = identity_cache.get(user_id)
+    if cached is not None:
+        return cached
+
+    user = db.session.get(User, user_id)
+    if user is None:
+        return None
+    snapshot = CurrentUser(user)
+    identity_cache.put(snapshot)
+    return snapshot
+
+
+@event.listens_for(Session, 'after_flush')
+def _collect_changed_users(session, flush_context):
+    changed = {obj.id for obj in list(session.dirty) + list(session.deleted) if isinstance(obj, User)}
+    if changed:
+        # Drop now, and again after commit in case another request re-cached the old row meanwhile
+        for user_id in changed:
+            identity_cache.invalidate(user_id)
+        session.info.setdefault('changed_user_ids', set()).update(changed)
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _collect_bulk_user_changes(orm_execute_state):
+    # Bulk UPDATE/DELETE on users never reaches the flush, and which rows it hit is unknown
+    if (orm_execute_state.is_update or orm_execute_state.is_delete) and \
+            any(mapper.class_ is User for mapper in orm_execute_state.all_mappers):
+        identity_cache.clear()
+        orm_execute_state.session.info['clear_identity_cache'] = True
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_changed_users(session):
+    if session.info.pop('clear_identity_cache', False):
+        identity_cache.clear()
+    for user_id in session.info.pop('changed_user_ids', ()):
+        identity_cache.invalidate(user_id)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _forget_changed_users(session):
+    session.info.pop('changed_user_ids', None)
+    session.info.pop('clear_identity_cache', None)
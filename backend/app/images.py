@@ -0,0 +1,180 @@
+"""Resized / re-encoded image derivatives behind /images, kept in a size-capped disk cache"""
+import hashlib
+import mimetypes
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+from flask import current_app, jsonify, request, send_file, send_from_directory
+from werkzeug.exceptions import NotFound
+from werkzeug.security import safe_join
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow is optional; without it the originals are served
+    Image = None
+
+# ?format= values: (Pillow format, file extension, mimetype)
+FORMATS = {
+    'webp': ('WEBP', '.webp', 'image/webp'),
+    'jpeg': ('JPEG', '.jpg', 'image/jpeg'),
+    'jpg': ('JPEG', '.jpg', 'image/jpeg'),
+    'png': ('PNG', '.png', 'image/png'),
+}
+
+# Sources Pillow can transform; anything else (SVG, ICO...) is always served as is
+RASTER = {'.png', '.jpg', '.jpeg', '.webp', '.gif'}
+
+
+def parse_variant(args):
+    """Return (width, height, format) from ?w=&h=&format=, or None when the original is wanted"""
+    if not any(args.get(name) for name in ('w', 'h', 'format')):
+        return None
+    max_dimension = current_app.config['IMAGE_MAX_DIMENSION']
+    size = []
+    for name in ('w', 'h'):
+        value = args.get(name)
+        if not value:
+            size.append(None)
+        elif value.isdigit() and 0 < int(value) <= max_dimension:
+            size.append(int(value))
+        else:
+            raise ValueError(f'{name} must be an integer between 1 and {max_dimension}')
+    image_format = args.get('format', '').lower() or None
+    if image_format and image_format not in FORMATS:
+        raise ValueError(f'format must be one of: {", ".join(sorted(FORMATS))}')
+    return size[0], size[1], image_format
+
+
+def render(source, target, variant, quality):
+    """Write the derivative of `source` to `target` atomically"""
+    width, height, image_format = variant
+    with Image.open(source) as image:
+        pillow_format = FORMATS[image_format][0] if image_format else image.format
+        if pillow_format == 'JPEG':
+            image = image.convert('RGB')
+        elif image.mode not in ('RGB', 'RGBA', 'L', 'LA'):
+            image = image.convert('RGBA')
+        if width or height:
+            # Keeps the aspect ratio and never upscales
+            image.thumbnail((width or image.width, height or image.height), Image.Resampling.LANCZOS)
+
+        fd, partial = tempfile.mkstemp(dir=os.path.dirname(target), suffix='.part')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                image.save(f, pillow_format, quality=quality, optimize=True)
+            os.replace(partial, target)
+        except BaseException:
+            os.unlink(partial)
+            raise
+
+
+class DerivativeCache:
+    """
+    Derivatives stored under the digest of (source content, variant, quality), so renamed
+    or duplicated sources share them and an edited source never serves a stale one.
+
+    Once the directory passes IMAGE_CACHE_MAX_BYTES the least recently served files are
+    removed. The LRU index is per process, built from file mtimes on first use; hits
+    touch their file so the order survives restarts.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = None  # relative path -> size, least recently served first
+        self._size = 0
+        self._digests = {}  # source path -> (mtime_ns, size, sha256)
+
+    def _source_digest(self, source):
+        stat = os.stat(source)
+        known = self._digests.get(source)
+        if known and known[:2] == (stat.st_mtime_ns, stat.st_size):
+            return known[2]
+        with open(source, 'rb') as f:
+            digest = hashlib.sha256(f.read()).hexdigest()
+        self._digests[source] = (stat.st_mtime_ns, stat.st_size, digest)
+        return digest
+
+    def _load(self, root):
+        found = []
+        for directory, _, names in os.walk(root):
+            for name in names:
+                if name.endswith('.part'):
+                    continue
+                stat = os.stat(os.path.join(directory, name))
+                found.append((stat.st_mtime, os.path.relpath(os.path.join(directory, name), root), stat.st_size))
+        self._entries = OrderedDict((name, size) for _, name, size in sorted(found))
+        self._size = sum(self._entries.values())
+
+    def _record(self, root, name, size):
+        """Mark `name` most recently served and evict past the cap (caller holds the lock)"""
+        if self._entries is None:
+            self._load(root)
+        self._size += size - self._entries.pop(name, 0)
+        self._entries[name] = size
+        max_bytes = current_app.config['IMAGE_CACHE_MAX_BYTES']
+        while self._size > max_bytes and len(self._entries) > 1:
+            evicted, evicted_size = self._entries.popitem(last=False)
+            self._size -= evicted_size
+            try:
+                os.remove(os.path.join(root, evicted))
+            except FileNotFoundError:
+                pass  # another process evicted it first
+
+    def open_for(self, source, variant):
+        """
+        Return (open file, digest) of the cached derivative of `source`, rendering it on a
+        miss. The file is opened before it is recorded, so an eviction by this or another
+        process can no longer pull it from under the response.
+        """
+        root = current_app.config['IMAGE_CACHE_DIR']
+        quality = current_app.config['IMAGE_QUALITY']
+        width, height, image_format = variant
+        extension = FORMATS[image_format][1] if image_format else os.path.splitext(source)[1].lower()
+        key = hashlib.sha256(
+            f'{self._source_digest(source)}:{width}x{height}:{image_format}:{quality}'.encode()
+        ).hexdigest()
+        name = os.path.join(key[:2], key + extension)
+        path = os.path.join(root, name)
+
+        try:
+            f = open(path, 'rb')
+        except FileNotFoundError:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            render(source, path, variant, quality)
+            f = open(path, 'rb')
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass  # evicted since it was opened; this response still has it
+        with self._lock:
+            self._record(root, name, os.fstat(f.fileno()).st_size)
+        return f, key
+
+
+derivatives = DerivativeCache()
+
+
+def send_image(directory, filename):
+    """GET /images/<filename>?w=&h=&format=: the original, or a cached derivative of it"""
+    source = safe_join(directory, filename)
+    if source is None or not os.path.isfile(source):
+        raise NotFound()
+    try:
+        variant = parse_variant(request.args)
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
+    if variant is None or Image is None or os.path.splitext(source)[1].lower() not in RASTER:
+        return send_from_directory(directory, filename)
+
+    try:
+        f, digest = derivatives.open_for(source, variant)
+    except (OSError, Image.DecompressionBombError):
+        return jsonify({'message': 'This image cannot be transformed'}), 415
+    # The digest covers the source content, so it is a strong ETag; the URL does not, so
+    # an edited source reaches browsers once IMAGE_CACHE_MAX_AGE has passed
+    mimetype = FORMATS[variant[2]][2] if variant[2] else mimetypes.guess_type(f.name)[0]
+    return send_file(f, mimetype=mimetype, conditional=True, etag=digest,
+                     last_modified=os.fstat(f.fileno()).st_mtime,
+                     max_age=current_app.config['IMAGE_CACHE_MAX_AGE'])
@@ -0,0 +1,167 @@
+"""Stock rules shared by every path that sells or holds products"""
+from collections import defaultdict
+
+from app import db
+from app.ledger import record_movements
+from app.models import Order, OrderItem, Product
+from app.sales import record_order
+
+
+class InsufficientStock(Exception):
+    def __init__(self, product, available):
+        self.product = product
+        self.available = available
+        super().__init__(f'Insufficient stock for {product.name}. Only {available} left.')
+
+
+def load_products(product_ids):
+    """Fetch all requested products in one IN query, keyed by id; retired products are left out"""
+    if not product_ids:
+        return {}
+    return {p.id: p for p in Product.query.filter(Product.id.in_(set(product_ids)), Product.active)}
+
+
+def _per_product(amounts, default=None):
+    return db.case(amounts, value=Product.id, else_=default)
+
+
+def _raise_shortfall(quantities, products, held):
+    """Someone else got there first: report the line that can no longer be filled"""
+    current = {
+        product_id: stock - reserved
+        for product_id, stock, reserved in db.session.query(Product.id, Product.stock, Product.reserved)
+        .filter(Product.id.in_(list(quantities)))
+    }
+    for product_id, quantity in quantities.items():
+        available = current.get(product_id, 0) + held.get(product_id, 0)
+        if available < quantity:
+            raise InsufficientStock(products[product_id], max(available, 0))
+    raise InsufficientStock(products[next(iter(quantities))], 0)
+
+
+def deduct_stock(quantities, products, held=None):
+    """
+    Take stock for {product_id: quantity} in a single conditional UPDATE.
+
+    `held` maps product ids to units the buyer already reserved; those holds are
+    released in the same statement and count towards what the buyer may take.
+    The WHERE clause only matches rows that still have enough unreserved stock, so
+    concurrent checkouts cannot oversell. If any row misses, InsufficientStock is
+    raised and the caller must roll back; nothing has been committed.
+    """
+    if not quantities:
+        return
+    held = held or {}
+
+    wanted = _per_product(quantities)
+    mine = _per_product(held, 0) if held else 0
+    # MySQL evaluates SET left to right, so availability must be computed before stock changes
+    assignments = [(Product.availability, Product.availability_for(Product.stock - wanted))]
+    if held:
+        assignments.append((Product.reserved, Product.reserved - mine))
+    assignments.append((Product.stock, Product.stock - wanted))
+
+    result = db.session.execute(
+        db.update(Product)
+        .where(Product.id.in_(list(quantities)), Product.stock - Product.reserved + mine >= wanted)
+        .ordered_values(*assignments)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount != len(quantities):
+        _raise_shortfall(quantities, products, held)
+
+
+def reserve_stock(quantities, products):
+    """Move {product_id: quantity} from available to reserved, all or nothing"""
+    if not quantities:
+        return
+    wanted = _per_product(quantities)
+    result = db.session.execute(
+        db.update(Product)
+        .where(Product.id.in_(list(quantities)), Product.stock - Product.reserved >= wanted)
+        .values(reserved=Product.reserved + wanted)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount != len(quantities):
+        _raise_shortfall(quantities, products, {})
+
+
+def release_stock(quantities):
+    """Give reserved units back to available stock"""
+    if not quantities:
+        return
+    released = _per_product(quantities)
+    db.session.execute(
+        db.update(Product)
+        .where(Product.id.in_(list(quantities)))
+        .values(reserved=db.case((Product.reserved > released, Product.reserved - released), else_=0))
+        .execution_options(synchronize_session=False)
+    )
+
+
+def restock(quantities):
+    """Put {product_id: quantity} back into stock in one UPDATE"""
+    if not quantities:
+        return
+    returned = _per_product(quantities)
+    db.session.execute(
+        db.update(Product)
+        .where(Product.id.in_(list(quantities)))
+        .ordered_values(
+            (Product.availability, Product.availability_for(Product.stock + returned)),
+            (Product.stock, Product.stock + returned)
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+
+def _order_lines(order_ids):
+    """(order_id, product_id, quantity) per product of each order"""
+    return db.session.query(OrderItem.order_id, OrderItem.product_id, db.func.sum(OrderItem.quantity)) \
+        .filter(OrderItem.order_id.in_(list(order_ids))) \
+        .group_by(OrderItem.order_id, OrderItem.product_id) \
+        .all()
+
+
+def _summed(lines):
+    quantities = defaultdict(int)
+    for _, product_id, quantity in lines:
+        quantities[product_id] += quantity
+    return quantities
+
+
+def cancel_orders(order_ids, user_id=None):
+    """
+    Return the stock of cancelled orders and log it; the caller updates their status
+    and commits. Returns {product_id: quantity} restocked.
+    """
+    lines = _order_lines(order_ids)
+    quantities = _summed(lines)
+    restock(quantities)
+    record_movements('cancellation', lines, user_id)
+    return quantities
+
+
+def place_order(user_id, order_items_data, quantities, products, held=None):
+    """
+    Deduct stock, insert the order with its items, log the stock movements and count
+    the order in the sales rollups; the caller commits.
+
+    `order_items_data` holds OrderItem field dicts and `quantities` the same lines
+    summed per product, as built by the validation phase of create_order.
+    """
+    deduct_stock(quantities, products, held)
+
+    order = Order(
+        user_id=user_id,
+        total_amount=sum(item['price'] * item['quantity'] for item in order_items_data),
+        status='Pending'
+    )
+    db.session.add(order)
+    db.session.flush()
+
+    db.session.add_all([OrderItem(order_id=order.id, **item_data) for item_data in order_items_data])
+    record_movements('order', [(order.id, product_id, -quantity) for product_id, quantity in quantities.items()],
+                     user_id)
+    record_order(order, order_items_data)
+    return order
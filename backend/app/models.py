@@ -1,5 +1,7 @@
 from datetime import datetime
-from app import db, bcrypt
+from flask import current_app
+from app import db
+from app.passwords import hash_cost, password_pool
 
 class User(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -8,15 +10,29 @@ class User(db.Model):
     phone = db.Column(db.String(20), nullable=True)
     password_hash = db.Column(db.String(128), nullable=False)
     is_admin = db.Column(db.Boolean, default=False)
+    token_version = db.Column(db.Integer, nullable=False, default=0, server_default='0')  # Bumped to revoke issued tokens
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
     orders = db.relationship('Order', backref='customer', lazy=True)
 
     def set_password(self, password):
-        self.password_hash = bcrypt.generate_password_hash(password).decode('utf-8')
+        self.password_hash = password_pool.hash(password)
 
     def check_password(self, password):
-        return bcrypt.check_password_hash(self.password_hash, password)
+        return password_pool.verify(self.password_hash, password)
+
+    def password_needs_rehash(self):
+        """True when the stored hash was made with a different BCRYPT_LOG_ROUNDS"""
+        return hash_cost(self.password_hash) != current_app.config['BCRYPT_LOG_ROUNDS']
+
+    def set_admin(self, is_admin):
+        """Change the role; tokens issued with the old role stop working"""
+        if bool(self.is_admin) != bool(is_admin):
+            self.is_admin = is_admin
+            self.revoke_tokens()
+
+    def revoke_tokens(self):
+        self.token_version = (self.token_version or 0) + 1
 
     def to_dict(self):
         return {
@@ -30,23 +46,42 @@ class User(db.Model):
 class Product(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
-    category = db.Column(db.String(50), nullable=False)
-    price = db.Column(db.Float, nullable=False)
+    category = db.Column(db.String(50), nullable=False, index=True)
+    price = db.Column(db.Float, nullable=False, index=True)
     description = db.Column(db.Text, nullable=True)
     specs = db.Column(db.Text, nullable=True)
     image_url = db.Column(db.String(200), nullable=True)
-    stock = db.Column(db.Integer, default=0)
-    availability = db.Column(db.String(20), default='In Stock')
+    stock = db.Column(db.Integer, default=0, index=True)
+    reserved = db.Column(db.Integer, nullable=False, default=0, server_default='0', index=True)  # Units held by active reservations
+    availability = db.Column(db.String(20), default='In Stock', index=True)
     warranty = db.Column(db.String(50), nullable=True)
+    # Retired products keep their rows (stock ledger, order history) but leave the catalog
+    active = db.Column(db.Boolean, nullable=False, default=True, server_default=db.true(), index=True)
+
+    LOW_STOCK_THRESHOLD = 5
+
+    @property
+    def available(self):
+        """Units that can still be ordered or reserved"""
+        return max((self.stock or 0) - (self.reserved or 0), 0)
 
     def update_availability(self):
         if self.stock <= 0:
             self.availability = 'Out of Stock'
-        elif self.stock < 5:
+        elif self.stock < self.LOW_STOCK_THRESHOLD:
             self.availability = 'Limited Stock'
         else:
             self.availability = 'In Stock'
 
+    @classmethod
+    def availability_for(cls, stock):
+        """SQL counterpart of update_availability, for set-based stock updates"""
+        return db.case(
+            (stock <= 0, 'Out of Stock'),
+            (stock < cls.LOW_STOCK_THRESHOLD, 'Limited Stock'),
+            else_='In Stock'
+        )
+
     def to_dict(self):
         return {
             'id': self.id,
@@ -57,6 +92,8 @@ class Product(db.Model):
             'specs': self.specs,
             'image_url': self.image_url,
             'stock': self.stock,
+            'reserved': self.reserved,
+            'available': self.available,
             'availability': self.availability,
             'warranty': self.warranty
         }
@@ -65,11 +102,14 @@ class Order(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     total_amount = db.Column(db.Float, nullable=False, default=0.0)
-    status = db.Column(db.String(20), default='Pending') # Pending, Completed, Cancelled
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    status = db.Column(db.String(20), default='Pending', index=True) # Pending, Completed, Cancelled
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
     
     items = db.relationship('OrderItem', backref='order', lazy=True)
 
+    # A customer's order history, newest first
+    __table_args__ = (db.Index('ix_order_user_id_created_at', 'user_id', 'created_at'),)
+
     def to_dict(self):
         return {
             'id': self.id,
@@ -87,6 +127,7 @@ class OrderItem(db.Model):
     product_name = db.Column(db.String(100), nullable=False) # Snapshot of name
     quantity = db.Column(db.Integer, nullable=False)
     price = db.Column(db.Float, nullable=False) # Snapshot of price at time of order
+    category = db.Column(db.String(50)) # Snapshot of category, which the sales rollups count it under
 
     def to_dict(self):
         return {
@@ -95,3 +136,112 @@ class OrderItem(db.Model):
             'quantity': self.quantity,
             'price': self.price
         }
+
+class IdempotencyKey(db.Model):
+    """Response of a POST /api/orders/ call, replayed when a client retries with the same key"""
+    id = db.Column(db.Integer, primary_key=True)
+    key = db.Column(db.String(255), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    order_id = db.Column(db.Integer, db.ForeignKey('order.id'), nullable=True)
+    status_code = db.Column(db.Integer, nullable=False)
+    response_body = db.Column(db.Text, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+
+    __table_args__ = (db.UniqueConstraint('user_id', 'key', name='uq_idempotency_key_user_key'),)
+
+class StockReservation(db.Model):
+    """Units of a product held for one user's cart until expires_at"""
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    product_id = db.Column(db.Integer, db.ForeignKey('product.id'), nullable=False)
+    quantity = db.Column(db.Integer, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+
+    __table_args__ = (db.UniqueConstraint('user_id', 'product_id', name='uq_stock_reservation_user_product'),)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'product_id': self.product_id,
+            'quantity': self.quantity,
+            'expires_at': self.expires_at.isoformat()
+        }
+
+class StockThreshold(db.Model):
+    """Low-stock level for one product or a whole category; a product row wins over its category"""
+    id = db.Column(db.Integer, primary_key=True)
+    product_id = db.Column(db.Integer, db.ForeignKey('product.id'), nullable=True, unique=True)
+    category = db.Column(db.String(50), nullable=True, unique=True)
+    low_stock = db.Column(db.Integer, nullable=False)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'product_id': self.product_id,
+            'category': self.category,
+            'low_stock': self.low_stock
+        }
+
+class DailySales(db.Model):
+    """Per-day totals of orders that are not cancelled, kept current by app.sales"""
+    day = db.Column(db.Date, primary_key=True)
+    orders = db.Column(db.Integer, nullable=False, default=0)
+    units = db.Column(db.Integer, nullable=False, default=0)
+    revenue = db.Column(db.Float, nullable=False, default=0.0)
+
+    def to_dict(self):
+        return {
+            'day': self.day.isoformat(),
+            'orders': self.orders,
+            'units': self.units,
+            'revenue': round(self.revenue, 2)
+        }
+
+class DailyCategorySales(db.Model):
+    day = db.Column(db.Date, primary_key=True)
+    category = db.Column(db.String(50), primary_key=True)
+    orders = db.Column(db.Integer, nullable=False, default=0)
+    units = db.Column(db.Integer, nullable=False, default=0)
+    revenue = db.Column(db.Float, nullable=False, default=0.0)
+
+class DailyProductSales(db.Model):
+    day = db.Column(db.Date, primary_key=True)
+    product_id = db.Column(db.Integer, primary_key=True)  # No FK: history outlives deleted products
+    orders = db.Column(db.Integer, nullable=False, default=0)
+    units = db.Column(db.Integer, nullable=False, default=0)
+    revenue = db.Column(db.Float, nullable=False, default=0.0)
+
+class StockMovement(db.Model):
+    """One signed change to a product's stock; rows are only ever appended"""
+    id = db.Column(db.Integer, primary_key=True)
+    product_id = db.Column(db.Integer, db.ForeignKey('product.id'), nullable=False)
+    delta = db.Column(db.Integer, nullable=False)
+    reason = db.Column(db.String(20), nullable=False)  # order, adjustment, cancellation, removal
+    order_id = db.Column(db.Integer, db.ForeignKey('order.id'), nullable=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=True)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    # Serves both a product's history and the tail after a snapshot
+    __table_args__ = (db.Index('ix_stock_movement_product_id_id', 'product_id', 'id'),)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'product_id': self.product_id,
+            'delta': self.delta,
+            'reason': self.reason,
+            'order_id': self.order_id,
+            'user_id': self.user_id,
+            'created_at': self.created_at.isoformat()
+        }
+
+class StockSnapshot(db.Model):
+    """A product's stock as of taken_at, covering its movements up to movement_id"""
+    id = db.Column(db.Integer, primary_key=True)
+    product_id = db.Column(db.Integer, db.ForeignKey('product.id'), nullable=False)
+    stock = db.Column(db.Integer, nullable=False)
+    movement_id = db.Column(db.Integer, nullable=False)  # 0 when no movement is covered yet
+    taken_at = db.Column(db.DateTime, nullable=False)
+
+    __table_args__ = (db.Index('ix_stock_snapshot_product_id_taken_at', 'product_id', 'taken_at'),)
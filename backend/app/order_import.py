@@ -0,0 +1,163 @@
+"""Streaming bulk order import (CSV or NDJSON) for institutional procurement"""
+import csv
+import io
+import json
+from collections import namedtuple
+from itertools import groupby
+
+from app import db
+from app.cache import catalog_cache
+from app.inventory import InsufficientStock, place_order
+from app.models import Product, User
+
+FORMATS = ('csv', 'ndjson')
+
+# Just what validation, pricing and the sales rollups need; full ORM rows would be expired by every batch commit
+ProductInfo = namedtuple('ProductInfo', 'id name price category')
+
+
+class RowError(ValueError):
+    pass
+
+
+class UserMap(dict):
+    """Lower-cased email -> user id, plus the set of known ids"""
+
+    def __init__(self, rows):
+        super().__init__((email.lower(), user_id) for user_id, email in rows)
+        self.ids = set(self.values())
+
+
+def read_rows(stream, fmt):
+    """Yield (row_number, fields) from the upload one line at a time"""
+    text = io.TextIOWrapper(stream, encoding='utf-8', newline='')
+    if fmt == 'csv':
+        for number, row in enumerate(csv.DictReader(text), start=1):
+            yield number, row
+        return
+
+    for number, line in enumerate(text, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            row = None
+        yield number, row if isinstance(row, dict) else RowError('Malformed JSON line')
+
+
+def _order_key(numbered_row):
+    """Consecutive rows sharing an order_ref make up one order; rows without one stand alone"""
+    number, row = numbered_row
+    ref = row.get('order_ref') if isinstance(row, dict) else None
+    return ref if ref not in (None, '') else ('row', number)
+
+
+def _parse_line(row, users, products):
+    """Return (user_id, product, quantity) for one row or raise RowError"""
+    if isinstance(row, RowError):
+        raise row
+
+    user_id = None
+    if row.get('user_id') not in (None, ''):
+        try:
+            user_id = int(row['user_id'])
+        except (TypeError, ValueError):
+            raise RowError('user_id must be an integer')
+        if user_id not in users.ids:
+            raise RowError(f'User with ID {user_id} not found')
+    elif row.get('user_email'):
+        user_id = users.get(str(row['user_email']).strip().lower())
+        if user_id is None:
+            raise RowError(f'User {row["user_email"]} not found')
+    else:
+        raise RowError('user_email or user_id required')
+
+    try:
+        product_id = int(row.get('product_id'))
+        quantity = int(row.get('quantity'))
+    except (TypeError, ValueError):
+        raise RowError('product_id and quantity must be integers')
+    if quantity <= 0:
+        raise RowError('quantity must be positive')
+    product = products.get(product_id)
+    if product is None:
+        raise RowError(f'Product with ID {product_id} not found')
+    return user_id, product, quantity
+
+
+def _import_order(order_ref, rows, users, products):
+    """Place one order inside a savepoint and return a result per row"""
+    def report(number, **fields):
+        return dict({'row': number, 'order_ref': order_ref}, **fields)
+
+    try:
+        lines = [(number, _parse_line(row, users, products)) for number, row in rows]
+        user_ids = {user_id for _, (user_id, _, _) in lines}
+        if len(user_ids) > 1:
+            raise RowError('All rows of one order_ref must belong to the same user')
+    except RowError as e:
+        return [report(number, status='error', message=str(e)) for number, _ in rows]
+
+    order_items_data = []
+    quantities = {}
+    for _, (_, product, quantity) in lines:
+        order_items_data.append({
+            'product_id': product.id,
+            'product_name': product.name,
+            'category': product.category,
+            'quantity': quantity,
+            'price': float(product.price)
+        })
+        quantities[product.id] = quantities.get(product.id, 0) + quantity
+
+    try:
+        with db.session.begin_nested():
+            order = place_order(user_ids.pop(), order_items_data, quantities, products)
+    except InsufficientStock as e:
+        return [report(number, status='error', message=str(e)) for number, _ in rows]
+    return [report(number, status='ok', order_id=order.id) for number, _ in rows]
+
+
+def import_orders(stream, fmt, batch_size):
+    """
+    Import orders from an upload, committing every `batch_size` orders.
+
+    Yields one result dict per row, then a summary. Results are only released after
+    their batch commits, so memory stays bounded by the batch size however large the
+    upload is. The product and user maps are loaded once up front.
+    """
+    products = {
+        row.id: ProductInfo(*row)
+        # Retired products are unknown here, as they are to checkout (load_products)
+        for row in db.session.query(Product.id, Product.name, Product.price, Product.category).filter(Product.active)
+    }
+    users = UserMap(db.session.query(User.id, User.email))
+
+    summary = {'rows': 0, 'orders': 0, 'failed_rows': 0}
+    pending = []
+    orders_in_batch = 0
+
+    for key, group in groupby(read_rows(stream, fmt), key=_order_key):
+        order_ref = None if isinstance(key, tuple) else key
+        results = _import_order(order_ref, list(group), users, products)
+
+        summary['rows'] += len(results)
+        if results[0]['status'] == 'ok':
+            summary['orders'] += 1
+        else:
+            summary['failed_rows'] += len(results)
+        pending.extend(results)
+
+        orders_in_batch += 1
+        if orders_in_batch >= batch_size:
+            db.session.commit()
+            catalog_cache.bump()
+            yield from pending
+            pending.clear()
+            orders_in_batch = 0
+
+    db.session.commit()
+    catalog_cache.bump()
+    yield from pending
+    yield {'summary': summary}
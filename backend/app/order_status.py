@@ -0,0 +1,58 @@
+"""Order status state machine and set-based status transitions"""
+from app import db
+from app.inventory import cancel_orders
+from app.models import Order
+from app.sales import record_cancellations
+
+STATUSES = ('Pending', 'Processing', 'Shipped', 'Delivered', 'Cancelled')
+
+# Where each status may go next; Delivered and Cancelled are final
+TRANSITIONS = {
+    'Pending': ('Processing', 'Cancelled'),
+    'Processing': ('Shipped', 'Cancelled'),
+    'Shipped': ('Delivered',),
+    'Delivered': (),
+    'Cancelled': (),
+}
+
+# Statuses an order may be in to move to each target
+SOURCES = {
+    target: tuple(source for source, targets in TRANSITIONS.items() if target in targets)
+    for target in STATUSES
+}
+
+
+def transition_orders(criteria, target, user_id=None, limit=None):
+    """
+    Move every order matching the SQL `criteria` that may go to `target`, in one UPDATE.
+
+    Matching orders are locked first; more than `limit` of them raises ValueError
+    before anything changes. Cancelling returns their stock and takes them
+    out of the sales rollups in the same transaction; the caller commits.
+    Returns (moved, rejected, restocked): moved and rejected are (id, user_id, status)
+    rows, restocked is {product_id: quantity}. Orders already in `target` are in neither.
+    """
+    rows = db.session.query(Order.id, Order.user_id, Order.status) \
+        .filter(*criteria) \
+        .order_by(Order.id) \
+        .with_for_update() \
+        .all()
+    if limit is not None and len(rows) > limit:
+        raise ValueError(f'A transition may touch at most {limit} orders; narrow it down')
+    moved = [row for row in rows if row.status in SOURCES[target]]
+    rejected = [row for row in rows if row.status not in SOURCES[target] and row.status != target]
+    if not moved:
+        return moved, rejected, {}
+
+    order_ids = [row.id for row in moved]
+    restocked = {}
+    if target == 'Cancelled':
+        restocked = cancel_orders(order_ids, user_id)
+        record_cancellations(order_ids)
+    db.session.execute(
+        db.update(Order)
+        .where(Order.id.in_(order_ids), Order.status.in_(SOURCES[target]))
+        .values(status=target)
+        .execution_options(synchronize_session=False)
+    )
+    return moved, rejected, restocked
@@ -0,0 +1,79 @@
+"""Keyset (cursor) pagination helpers shared by the list endpoints"""
+import base64
+import json
+from datetime import datetime
+
+from flask import current_app, request
+from sqlalchemy import and_, or_
+
+
+def get_page_limit():
+    """Read ?limit= from the query string, clamped to MAX_PAGE_SIZE"""
+    raw = request.args.get('limit')
+    if raw is None:
+        return current_app.config['PAGE_SIZE']
+    try:
+        limit = int(raw)
+    except ValueError:
+        raise ValueError('limit must be an integer')
+    if limit <= 0:
+        raise ValueError('limit must be positive')
+    return min(limit, current_app.config['MAX_PAGE_SIZE'])
+
+
+def encode_cursor(values):
+    """Pack the sort key of the last row into an opaque, URL-safe token"""
+    raw = json.dumps([v.isoformat() if isinstance(v, datetime) else v for v in values],
+                     separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token, columns):
+    """Unpack a token produced by encode_cursor for the given sort columns"""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except (ValueError, UnicodeError):
+        raise ValueError('Invalid cursor')
+    if not isinstance(values, list) or len(values) != len(columns):
+        raise ValueError('Invalid cursor')
+
+    decoded = []
+    for column, value in zip(columns, values):
+        if value is not None and column.type.python_type is datetime:
+            try:
+                value = datetime.fromisoformat(value)
+            except (TypeError, ValueError):
+                raise ValueError('Invalid cursor')
+        decoded.append(value)
+    return decoded
+
+
+def _seek_condition(columns, values, descending):
+    """(a, b) > (x, y) spelled out as a > x OR (a = x AND b > y), which every backend can index"""
+    clauses = []
+    for i, column in enumerate(columns):
+        step = column < values[i] if descending else column > values[i]
+        equal = [columns[j] == values[j] for j in range(i)]
+        clauses.append(and_(*equal, step) if equal else step)
+    return or_(*clauses)
+
+
+def keyset_paginate(query, columns, limit, after=None, descending=False):
+    """
+    Return one page of `query` ordered by `columns` and the cursor of the next page.
+
+    The last column must be unique (normally the primary key) so the order is total.
+    One extra row is fetched to detect whether another page exists, so no COUNT is needed.
+    """
+    if after:
+        query = query.filter(_seek_condition(columns, decode_cursor(after, columns), descending))
+
+    ordering = [c.desc() if descending else c.asc() for c in columns]
+    rows = query.order_by(*ordering).limit(limit + 1).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor([getattr(rows[-1], c.key) for c in columns])
+    return rows, next_cursor
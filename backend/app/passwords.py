@@ -0,0 +1,77 @@
+"""Bounded worker pool for bcrypt hashing and verification"""
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+
+from flask import current_app, jsonify
+
+from app import bcrypt
+
+
+class PasswordPoolBusy(Exception):
+    """Raised instead of queueing more password work than the pool allows"""
+
+
+class _PoolState:
+    def __init__(self, workers, queue_depth, timeout):
+        # bcrypt releases the GIL while hashing, so threads give real parallelism
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='bcrypt')
+        self.slots = threading.BoundedSemaphore(workers + queue_depth)
+        self.timeout = timeout
+
+
+class PasswordPool:
+    """
+    Runs bcrypt on a fixed number of threads with a bounded queue in front.
+
+    A burst of logins then occupies at most PASSWORD_HASH_WORKERS cores; requests that
+    would queue beyond PASSWORD_HASH_QUEUE_DEPTH fail fast with a 503 instead of tying
+    up every web worker while catalog traffic waits behind them.
+    """
+
+    def init_app(self, app):
+        app.extensions['password_pool'] = _PoolState(
+            app.config['PASSWORD_HASH_WORKERS'],
+            app.config['PASSWORD_HASH_QUEUE_DEPTH'],
+            app.config['PASSWORD_HASH_TIMEOUT'],
+        )
+        app.register_error_handler(PasswordPoolBusy, _busy_response)
+
+    def run(self, fn, *args):
+        state = current_app.extensions['password_pool']
+        if not state.slots.acquire(blocking=False):
+            raise PasswordPoolBusy()
+        try:
+            future = state.executor.submit(fn, *args)
+        except BaseException:
+            state.slots.release()
+            raise
+        future.add_done_callback(lambda _: state.slots.release())
+        try:
+            return future.result(timeout=state.timeout)
+        except TimeoutError:
+            raise PasswordPoolBusy()
+
+    def hash(self, password):
+        rounds = current_app.config['BCRYPT_LOG_ROUNDS']
+        return self.run(bcrypt.generate_password_hash, password, rounds).decode('utf-8')
+
+    def verify(self, password_hash, password):
+        return self.run(bcrypt.check_password_hash, password_hash, password)
+
+
+def hash_cost(password_hash):
+    """Cost factor stored in a bcrypt hash ("$2b$12$..." -> 12)"""
+    try:
+        return int(password_hash.split('$')[2])
+    except (AttributeError, IndexError, ValueError):
+        return None
+
+
+def _busy_response(e):
+    response = jsonify({'message': 'Server is busy, please try again shortly'})
+    response.status_code = 503
+    response.headers['Retry-After'] = '1'
+    return response
+
+
+password_pool = PasswordPool()
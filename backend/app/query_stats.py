@@ -0,0 +1,109 @@
+"""Per-request SQL query count and time, slow-query log and N+1 detection"""
+import time
+from collections import Counter
+
+from flask import current_app, g, has_app_context, has_request_context, jsonify, request
+from sqlalchemy import event
+
+from app import db
+
+
+class RequestQueries:
+    """What one request ran: statement count, total DB time, and runs per statement text"""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.statements = Counter()
+
+    def repeated(self, threshold):
+        """Statements run at least `threshold` times: the same SQL with new parameters, i.e. a loop"""
+        return [(statement, runs) for statement, runs in self.statements.most_common() if runs >= threshold]
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._query_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - context._query_started
+    if not has_app_context():
+        return
+    if elapsed * 1000 >= current_app.config['SQL_SLOW_QUERY_MS']:
+        current_app.logger.warning('Slow query (%.1f ms%s): %s', elapsed * 1000,
+                                   f' in {request.method} {request.path}' if has_request_context() else '',
+                                   ' '.join(statement.split()))
+    queries = g.get('queries') if has_request_context() else None
+    if queries is not None:
+        queries.count += 1
+        queries.seconds += elapsed
+        queries.statements[statement] += 1
+
+
+class QueryStats:
+    """
+    Counts and times every statement a request runs, via engine events.
+
+    With SQL_TIMING_HEADERS, buffered responses carry X-Query-Count and a Server-Timing
+    "db" entry. Statements slower than SQL_SLOW_QUERY_MS are logged. One statement text
+    run SQL_N_PLUS_ONE_THRESHOLD times or more in a request is logged as a likely N+1;
+    with SQL_STRICT (meant for tests) the request fails with a 500 instead. A streamed
+    body runs its queries after the headers went out, so it gets no headers and is
+    checked once it has been sent, where strict mode can only log an error and raise.
+    """
+
+    def init_app(self, app):
+        with app.app_context():
+            for engine in db.engines.values():
+                event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+                event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+        app.before_request(self.start)
+        app.after_request(self.finish)
+
+    def start(self):
+        g.queries = RequestQueries()
+
+    def finish(self, response):
+        queries = g.get('queries')
+        if queries is None:
+            return response
+
+        if response.is_streamed:
+            # Left on g so the body's queries are counted while it streams
+            app, method, path = current_app._get_current_object(), request.method, request.path
+            response.call_on_close(lambda: self._check_stream(app, queries, method, path))
+            return response
+        g.pop('queries')
+
+        config = current_app.config
+        suspects = self._suspects(current_app, queries, request.method, request.path)
+        if suspects and config['SQL_STRICT']:
+            statement, runs = suspects[0]
+            response = jsonify({'message': f'Likely N+1 query, ran {runs} times: {" ".join(statement.split())}'})
+            response.status_code = 500
+
+        if config['SQL_TIMING_HEADERS']:
+            response.headers['X-Query-Count'] = str(queries.count)
+            label = 'query' if queries.count == 1 else 'queries'
+            timing = f'db;dur={queries.seconds * 1000:.1f};desc="{queries.count} {label}"'
+            existing = response.headers.get('Server-Timing')
+            response.headers['Server-Timing'] = f'{existing}, {timing}' if existing else timing
+        return response
+
+    @staticmethod
+    def _suspects(app, queries, method, path):
+        suspects = queries.repeated(app.config['SQL_N_PLUS_ONE_THRESHOLD'])
+        for statement, runs in suspects:
+            app.logger.warning('Likely N+1 in %s %s: ran %d times: %s', method, path, runs,
+                               ' '.join(statement.split()))
+        return suspects
+
+    def _check_stream(self, app, queries, method, path):
+        suspects = self._suspects(app, queries, method, path)
+        if suspects and app.config['SQL_STRICT']:
+            statement, runs = suspects[0]
+            raise RuntimeError(f'Likely N+1 query in streamed {method} {path}, ran {runs} times: '
+                               f'{" ".join(statement.split())}')
+
+
+query_stats = QueryStats()
@@ -0,0 +1,134 @@
+"""Token-bucket rate limiting for the auth endpoints"""
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from functools import wraps
+
+from flask import current_app, jsonify, request
+from werkzeug.utils import import_string
+
+
+class RateLimitBackend(ABC):
+    """
+    Storage for token buckets. Swap in a shared implementation (e.g. Redis) through
+    RATELIMIT_BACKEND so every worker sees the same counts.
+    """
+
+    @classmethod
+    def from_config(cls, config):
+        """Build the backend named by RATELIMIT_BACKEND; override to read its own settings"""
+        return cls()
+
+    @abstractmethod
+    def hit(self, key, capacity, period):
+        """
+        Spend one token from `key`'s bucket, which holds `capacity` tokens and refills
+        completely over `period` seconds. Return 0 if allowed, otherwise the number of
+        seconds until a token is available.
+        """
+
+
+class MemoryBackend(RateLimitBackend):
+    """
+    Per-process buckets: two numbers per active key.
+
+    Keys are kept in least-recently-hit order. A bucket that has had time to refill
+    completely is indistinguishable from a new one, so idle keys are dropped from the
+    front as new hits arrive, and max_keys caps the total regardless.
+    """
+
+    def __init__(self, max_keys=100000):
+        self.max_keys = max_keys
+        self._lock = threading.Lock()
+        self._buckets = OrderedDict()  # key -> [tokens, updated_at, idle_after]
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(config['RATELIMIT_MAX_KEYS'])
+
+    def hit(self, key, capacity, period):
+        now = time.monotonic()
+        rate = capacity / period
+        with self._lock:
+            self._evict_idle(now)
+
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = [float(capacity), now, 0.0]
+            else:
+                bucket[0] = min(capacity, bucket[0] + (now - bucket[1]) * rate)
+                bucket[1] = now
+                self._buckets.move_to_end(key)
+
+            if bucket[0] >= 1:
+                bucket[0] -= 1
+                allowed = True
+            else:
+                allowed = False
+            bucket[2] = now + (capacity - bucket[0]) / rate
+
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+
+        return 0 if allowed else (1 - bucket[0]) / rate
+
+    def _evict_idle(self, now):
+        while self._buckets:
+            key, bucket = next(iter(self._buckets.items()))
+            if bucket[2] > now:
+                return
+            del self._buckets[key]
+
+    def __len__(self):
+        return len(self._buckets)
+
+
+class RateLimiter:
+    def init_app(self, app):
+        backend = app.config['RATELIMIT_BACKEND']
+        if isinstance(backend, str):
+            backend = import_string(backend).from_config(app.config)
+        app.extensions['rate_limiter'] = backend
+
+    def limit(self, name, **key_funcs):
+        """
+        Decorate a view so each request spends a token per key before the view runs.
+
+        `key_funcs` map a key kind (e.g. ip, email) to a function of the request that
+        returns the key, or None to skip it. Limits come from config as
+        RATELIMIT_<NAME>_PER_<KIND> = (attempts, seconds).
+        """
+        def decorator(view):
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                if current_app.config['RATELIMIT_ENABLED']:
+                    backend = current_app.extensions['rate_limiter']
+                    for kind, key_func in key_funcs.items():
+                        key = key_func()
+                        if key is None:
+                            continue
+                        capacity, period = current_app.config[f'RATELIMIT_{name.upper()}_PER_{kind.upper()}']
+                        retry_after = backend.hit(f'{name}:{kind}:{key}', capacity, period)
+                        if retry_after:
+                            response = jsonify({'message': 'Too many attempts, please try again later'})
+                            response.status_code = 429
+                            response.headers['Retry-After'] = str(max(1, int(retry_after + 0.999)))
+                            return response
+                return view(*args, **kwargs)
+            return wrapper
+        return decorator
+
+
+def client_ip():
+    """The client address; behind a proxy this relies on TRUSTED_PROXY_HOPS (ProxyFix)"""
+    return request.remote_addr
+
+
+def submitted_email():
+    data = request.get_json(silent=True)
+    email = data.get('email') if isinstance(data, dict) else None
+    return email.strip().lower() if isinstance(email, str) and email.strip() else None
+
+
+rate_limiter = RateLimiter()
@@ -0,0 +1,121 @@
+"""Time-limited stock holds for carts"""
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+import click
+from flask import current_app
+
+from app import db
+from app.cache import catalog_cache
+from app.inventory import load_products, release_stock, reserve_stock
+from app.models import StockReservation
+
+
+def set_holds(user_id, quantities):
+    """
+    Make the user's holds match {product_id: quantity} (0 drops a hold) and restart their TTL.
+
+    Only the difference against existing holds touches Product.reserved, so re-posting
+    the whole cart is cheap. Raises LookupError for unknown products and InsufficientStock
+    when an increase cannot be covered; the caller rolls back in both cases.
+    """
+    products = load_products(quantities)
+    missing = set(quantities) - set(products)
+    if missing:
+        raise LookupError(f'Product with ID {min(missing)} not found')
+
+    existing = {
+        hold.product_id: hold
+        for hold in StockReservation.query
+        .filter(StockReservation.user_id == user_id, StockReservation.product_id.in_(list(quantities)))
+        .with_for_update()
+    }
+
+    increase, decrease = {}, {}
+    for product_id, quantity in quantities.items():
+        delta = quantity - (existing[product_id].quantity if product_id in existing else 0)
+        if delta > 0:
+            increase[product_id] = delta
+        elif delta < 0:
+            decrease[product_id] = -delta
+    release_stock(decrease)
+    reserve_stock(increase, products)
+
+    expires_at = datetime.utcnow() + timedelta(seconds=current_app.config['RESERVATION_TTL'])
+    holds = []
+    for product_id, quantity in quantities.items():
+        hold = existing.get(product_id)
+        if quantity == 0:
+            if hold:
+                db.session.delete(hold)
+            continue
+        if hold is None:
+            hold = StockReservation(user_id=user_id, product_id=product_id)
+            db.session.add(hold)
+        hold.quantity = quantity
+        hold.expires_at = expires_at
+        holds.append(hold)
+    return holds
+
+
+def release_hold(hold):
+    release_stock({hold.product_id: hold.quantity})
+    db.session.delete(hold)
+
+
+def take_holds(user_id, product_ids):
+    """
+    Remove the user's holds on these products and return {product_id: quantity}.
+
+    The caller passes the result to deduct_stock as `held`, which turns the holds into
+    a committed deduction in the same transaction. Holds past their expiry still count
+    until the sweeper gets to them, because their units are still in Product.reserved.
+    """
+    if not product_ids:
+        return {}
+    holds = StockReservation.query.filter(
+        StockReservation.user_id == user_id,
+        StockReservation.product_id.in_(list(product_ids))
+    ).with_for_update().all()
+
+    held = {}
+    for hold in holds:
+        held[hold.product_id] = hold.quantity
+        db.session.delete(hold)
+    return held
+
+
+def sweep_expired(batch_size=None):
+    """Release one batch of expired holds and commit; returns how many were released"""
+    batch_size = batch_size or current_app.config['RESERVATION_SWEEP_BATCH']
+    expired = db.session.query(StockReservation.id, StockReservation.product_id, StockReservation.quantity) \
+        .filter(StockReservation.expires_at < datetime.utcnow()) \
+        .order_by(StockReservation.expires_at) \
+        .limit(batch_size) \
+        .with_for_update(skip_locked=True) \
+        .all()
+    if not expired:
+        return 0
+
+    released = defaultdict(int)
+    for _, product_id, quantity in expired:
+        released[product_id] += quantity
+    release_stock(released)
+    StockReservation.query.filter(StockReservation.id.in_([row.id for row in expired])) \
+        .delete(synchronize_session=False)
+    db.session.commit()
+    catalog_cache.bump()
+    return len(expired)
+
+
+@click.command('sweep-reservations')
+@click.option('--batch-size', type=int, default=None, help='Holds per transaction (default RESERVATION_SWEEP_BATCH).')
+def sweep_reservations_command(batch_size):
+    """Release every expired stock reservation, one batch at a time."""
+    total = 0
+    while True:
+        released = sweep_expired(batch_size)
+        if not released:
+            break
+        total += released
+    click.echo(f'Released {total} expired reservations.')
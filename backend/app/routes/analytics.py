@@ -0,0 +1,110 @@
+from datetime import date, datetime, timedelta
+from flask import Blueprint, current_app, jsonify, request
+from app import db
+from app.decorators import admin_required
+from app.models import DailyCategorySales, DailyProductSales, DailySales, Product
+from app.pagination import get_page_limit
+
+bp = Blueprint('analytics', __name__)
+
+def parse_day_range():
+    """Read inclusive ?date_from=&date_to= days, defaulting to the last SALES_DEFAULT_DAYS days"""
+    try:
+        date_to = date.fromisoformat(request.args['date_to']) if request.args.get('date_to') \
+            else datetime.utcnow().date()
+        date_from = date.fromisoformat(request.args['date_from']) if request.args.get('date_from') \
+            else date_to - timedelta(days=current_app.config['SALES_DEFAULT_DAYS'] - 1)
+    except ValueError:
+        raise ValueError('date_from and date_to must be ISO dates (YYYY-MM-DD)')
+    if date_from > date_to:
+        raise ValueError('date_from must not be after date_to')
+    return date_from, date_to
+
+def summed(model):
+    return [
+        db.func.sum(model.orders).label('orders'),
+        db.func.sum(model.units).label('units'),
+        db.func.sum(model.revenue).label('revenue'),
+    ]
+
+def totals_dict(row):
+    return {
+        'orders': int(row.orders or 0),
+        'units': int(row.units or 0),
+        'revenue': round(row.revenue or 0.0, 2)
+    }
+
+@bp.route('/sales/daily', methods=['GET'])
+@admin_required
+def daily_sales():
+    """Revenue, units and orders per day (Admin only)"""
+    try:
+        date_from, date_to = parse_day_range()
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
+
+    days = DailySales.query \
+        .filter(DailySales.day >= date_from, DailySales.day <= date_to) \
+        .order_by(DailySales.day) \
+        .all()
+    totals = db.session.query(*summed(DailySales)) \
+        .filter(DailySales.day >= date_from, DailySales.day <= date_to) \
+        .one()
+
+    return jsonify({
+        'date_from': date_from.isoformat(),
+        'date_to': date_to.isoformat(),
+        'days': [d.to_dict() for d in days],
+        'totals': totals_dict(totals)
+    }), 200
+
+@bp.route('/sales/categories', methods=['GET'])
+@admin_required
+def category_sales():
+    """Revenue, units and orders per category over a date range, best first (Admin only)"""
+    try:
+        date_from, date_to = parse_day_range()
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
+
+    rows = db.session.query(DailyCategorySales.category, *summed(DailyCategorySales)) \
+        .filter(DailyCategorySales.day >= date_from, DailyCategorySales.day <= date_to) \
+        .group_by(DailyCategorySales.category) \
+        .order_by(db.desc('revenue')) \
+        .all()
+
+    return jsonify({
+        'date_from': date_from.isoformat(),
+        'date_to': date_to.isoformat(),
+        'categories': [dict(category=row.category, **totals_dict(row)) for row in rows]
+    }), 200
+
+@bp.route('/sales/products', methods=['GET'])
+@admin_required
+def product_sales():
+    """Best-selling products by revenue over a date range (Admin only)"""
+    try:
+        date_from, date_to = parse_day_range()
+        limit = get_page_limit()
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
+
+    top = db.session.query(DailyProductSales.product_id, *summed(DailyProductSales)) \
+        .filter(DailyProductSales.day >= date_from, DailyProductSales.day <= date_to) \
+        .group_by(DailyProductSales.product_id) \
+        .order_by(db.desc('revenue'), DailyProductSales.product_id) \
+        .limit(limit) \
+        .subquery()
+    rows = db.session.query(top, Product.name, Product.category) \
+        .outerjoin(Product, Product.id == top.c.product_id) \
+        .order_by(top.c.revenue.desc(), top.c.product_id) \
+        .all()
+
+    return jsonify({
+        'date_from': date_from.isoformat(),
+        'date_to': date_to.isoformat(),
+        'products': [
+            dict(product_id=row.product_id, name=row.name, category=row.category, **totals_dict(row))
+            for row in rows
+        ]
+    }), 200
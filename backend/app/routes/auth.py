@@ -1,11 +1,14 @@
 from flask import Blueprint, request, jsonify
 from app import db
+from app.decorators import access_claims
 from app.models import User
-from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
+from app.ratelimit import client_ip, rate_limiter, submitted_email
+from flask_jwt_extended import create_access_token, current_user, jwt_required
 
 bp = Blueprint('auth', __name__)
 
 @bp.route('/register', methods=['POST'])
+@rate_limiter.limit('register', ip=client_ip)
 def register():
     data = request.get_json()
     
@@ -30,6 +33,7 @@ def register():
     return jsonify({'message': 'User registered successfully'}), 201
 
 @bp.route('/login', methods=['POST'])
+@rate_limiter.limit('login', ip=client_ip, email=submitted_email)
 def login():
     data = request.get_json()
     
@@ -39,7 +43,13 @@ def login():
     user = User.query.filter_by(email=data['email']).first()
     
     if user and user.check_password(data['password']):
-        access_token = create_access_token(identity=str(user.id))
+        # Transparently upgrade hashes made with an older cost factor
+        if user.password_needs_rehash():
+            user.set_password(data['password'])
+            db.session.commit()
+        
+        # Role and token version ride in signed claims so admin checks need no User fetch
+        access_token = create_access_token(identity=str(user.id), additional_claims=access_claims(user))
         return jsonify({
             'message': 'Login successful',
             'access_token': access_token,
@@ -51,9 +61,8 @@ def login():
 @bp.route('/me', methods=['GET'])
 @jwt_required()
 def get_current_user():
-    current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
-    return jsonify(user.to_dict()), 200
+    # Resolved once per request by the JWT user loader (app/identity.py)
+    return jsonify(current_user.to_dict()), 200
 
 @bp.route('/users', methods=['GET'])
 # @jwt_required() # Should be protected in prod
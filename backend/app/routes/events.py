@@ -0,0 +1,85 @@
+from flask import Blueprint, Response, current_app, jsonify, request
+from app.events import broker, tickets
+from flask_jwt_extended import get_current_user, get_jwt, jwt_required
+
+bp = Blueprint('events', __name__)
+
+def disabled():
+    return jsonify({'message': 'Live updates are disabled on this server'}), 404
+
+@bp.route('/ticket', methods=['POST'])
+@jwt_required()
+def issue_ticket():
+    """
+    Single-use ticket for opening the stream as the current user. EventSource cannot
+    send headers, so browsers pass it as ?ticket= instead of the access token.
+    """
+    if not current_app.config['SSE_ENABLED']:
+        return disabled()
+    
+    user = get_current_user()
+    is_admin = user.is_admin and user.token_version == get_jwt().get('tv')
+    return jsonify({
+        'ticket': tickets.issue(user.id, is_admin),
+        'expires_in': current_app.config['SSE_TICKET_TTL']
+    }), 201
+
+@bp.route('/stream', methods=['GET'])
+@jwt_required(optional=True)
+def stream():
+    """
+    Server-Sent Events feed of committed changes: `stock` and `product` for everyone,
+    `order` status changes for the order's owner and admins.
+
+    Signed-in browsers pass a ticket from POST /ticket as ?ticket=; other clients may
+    send the usual Authorization header. Reconnecting clients resume from
+    Last-Event-ID (or ?last_event_id=). A `reset` event means the gap could not be
+    replayed and the client should refetch.
+    """
+    if not current_app.config['SSE_ENABLED']:
+        return disabled()
+    
+    ticket = request.args.get('ticket')
+    if ticket:
+        holder = tickets.redeem(ticket)
+        if holder is None:
+            return jsonify({'message': 'Invalid or expired stream ticket'}), 401
+        user_id, is_admin = holder
+    else:
+        user = get_current_user()
+        user_id = user.id if user else None
+        is_admin = user is not None and user.is_admin and user.token_version == get_jwt().get('tv')
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+    
+    subscription, backlog = broker.subscribe(user_id, is_admin, last_event_id)
+    if subscription is None:
+        response = jsonify({'message': 'Too many live connections, please retry later'})
+        response.status_code = 503
+        response.headers['Retry-After'] = '30'
+        return response
+    
+    keepalive = current_app.config['SSE_KEEPALIVE']
+    retry = current_app.config['SSE_RETRY_MS']
+    
+    def generate():
+        yield f'retry: {retry}\n\n'
+        if backlog is None:
+            yield broker.reset()
+        elif backlog:
+            yield ''.join(broker.format(event) for event in backlog)
+        while True:
+            overflowed, events = subscription.wait(keepalive)
+            if overflowed:
+                yield broker.reset()
+            if events:
+                yield ''.join(broker.format(event) for event in events)
+            elif not overflowed:
+                yield ': keep-alive\n\n'
+    
+    response = Response(generate(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no',  # let nginx pass events through unbuffered
+    })
+    # Runs when the client goes away, even if the stream never started
+    response.call_on_close(lambda: broker.unsubscribe(subscription))
+    return response
@@ -0,0 +1,189 @@
+from datetime import datetime
+from flask import Blueprint, jsonify, request
+from sqlalchemy.orm import aliased
+from app import db
+from app.cache import cached_catalog_response, catalog_cache
+from app.decorators import admin_required
+from app.ledger import stock_at
+from app.models import Product, StockMovement, StockThreshold
+from app.pagination import get_page_limit, keyset_paginate
+
+bp = Blueprint('inventory', __name__)
+
+STATUSES = ('out_of_stock', 'low_stock', 'healthy')
+
+def low_stock_bound():
+    """
+    Stock below which every out-of-stock or low-stock product lies: available units are
+    under the largest threshold, and stock exceeds them by at most the largest reservation.
+    Both maxima are read off indexes, so the bound costs two index lookups.
+    """
+    largest_threshold = db.session.query(db.func.max(StockThreshold.low_stock)).scalar() or 0
+    largest_reserved = db.session.query(db.func.max(Product.reserved)).scalar() or 0
+    return max(largest_threshold, Product.LOW_STOCK_THRESHOLD, 1) + largest_reserved
+
+def stock_health_query(*columns, below=None):
+    """
+    Select `columns` plus each product's effective low-stock threshold and health status.
+
+    The threshold is the product's own row, else its category's, else
+    Product.LOW_STOCK_THRESHOLD; both lookups hit unique indexes. Health is judged on
+    available units (stock minus reserved). Pass `below` (see low_stock_bound) to
+    only look at products whose stock is under it, a range scan on ix_product_stock.
+    """
+    by_product = aliased(StockThreshold)
+    by_category = aliased(StockThreshold)
+    threshold = db.func.coalesce(by_product.low_stock, by_category.low_stock, Product.LOW_STOCK_THRESHOLD)
+    available = Product.stock - Product.reserved
+    status = db.case(
+        (available <= 0, 'out_of_stock'),
+        (available < threshold, 'low_stock'),
+        else_='healthy'
+    )
+    query = db.session.query(*columns, threshold.label('threshold'), status.label('status')) \
+        .select_from(Product) \
+        .outerjoin(by_product, by_product.product_id == Product.id) \
+        .outerjoin(by_category, by_category.category == Product.category) \
+        .filter(Product.active)
+    if below is not None:
+        query = query.filter(Product.stock < below)
+    if request.args.get('category'):
+        query = query.filter(Product.category == request.args['category'])
+    return query, status, available
+
+@bp.route('/report', methods=['GET'])
+@admin_required
+@cached_catalog_response
+def inventory_report():
+    """Counts per stock health status plus the most urgent out-of-stock and low-stock products (Admin only)"""
+    try:
+        limit = get_page_limit()
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
+    
+    # Only products under the bound can be unhealthy; the rest are counted, not classified
+    below = low_stock_bound()
+    query, status, _ = stock_health_query(below=below)
+    counts = dict.fromkeys(STATUSES, 0)
+    counts.update(query.with_entities(status, db.func.count()).group_by(status).all())
+    total = db.session.query(db.func.count(Product.id)).filter(Product.active)
+    if request.args.get('category'):
+        total = total.filter(Product.category == request.args['category'])
+    total = total.scalar()
+    counts['healthy'] = total - counts['out_of_stock'] - counts['low_stock']
+    
+    columns = [Product.id, Product.name, Product.category, Product.stock, Product.reserved]
+    report = {'counts': dict(counts, total=total)}
+    for wanted in ('out_of_stock', 'low_stock'):
+        rows, wanted_status, available = stock_health_query(*columns, below=below)
+        rows = rows.filter(wanted_status == wanted).order_by(available, Product.id).limit(limit)
+        report[wanted] = [
+            {
+                'id': row.id,
+                'name': row.name,
+                'category': row.category,
+                'stock': row.stock,
+                'reserved': row.reserved,
+                'available': max(row.stock - row.reserved, 0),
+                'threshold': row.threshold
+            }
+            for row in rows
+        ]
+    
+    return jsonify(report), 200
+
+@bp.route('/thresholds', methods=['GET'])
+@admin_required
+def get_thresholds():
+    """List configured low-stock thresholds (Admin only)"""
+    thresholds = StockThreshold.query.order_by(StockThreshold.category, StockThreshold.product_id).all()
+    return jsonify({
+        'default': Product.LOW_STOCK_THRESHOLD,
+        'thresholds': [t.to_dict() for t in thresholds]
+    }), 200
+
+@bp.route('/thresholds', methods=['PUT'])
+@admin_required
+def set_threshold():
+    """Set the low-stock threshold of a product or a category (Admin only)"""
+    data = request.get_json() or {}
+    
+    if ('product_id' in data) == ('category' in data):
+        return jsonify({'message': 'Provide either product_id or category'}), 400
+    try:
+        low_stock = int(data.get('low_stock'))
+    except (TypeError, ValueError):
+        return jsonify({'message': 'low_stock must be an integer'}), 400
+    if low_stock < 0:
+        return jsonify({'message': 'low_stock cannot be negative'}), 400
+    
+    if 'product_id' in data:
+        product = Product.query.filter_by(id=data['product_id'], active=True).first_or_404()
+        threshold = StockThreshold.query.filter_by(product_id=product.id).first() \
+            or StockThreshold(product_id=product.id)
+    else:
+        if not data['category']:
+            return jsonify({'message': 'category cannot be empty'}), 400
+        threshold = StockThreshold.query.filter_by(category=data['category']).first() \
+            or StockThreshold(category=data['category'])
+    
+    try:
+        threshold.low_stock = low_stock
+        db.session.add(threshold)
+        db.session.commit()
+        catalog_cache.bump()
+        
+        return jsonify({'message': 'Threshold saved', 'threshold': threshold.to_dict()}), 200
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'message': f'Failed to save threshold: {str(e)}'}), 500
+
+@bp.route('/thresholds/<int:id>', methods=['DELETE'])
+@admin_required
+def delete_threshold(id):
+    """Remove a threshold; the product or category falls back to the next level (Admin only)"""
+    threshold = StockThreshold.query.get_or_404(id)
+    
+    try:
+        db.session.delete(threshold)
+        db.session.commit()
+        catalog_cache.bump()
+        
+        return jsonify({'message': 'Threshold removed'}), 200
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'message': f'Failed to remove threshold: {str(e)}'}), 500
+
+@bp.route('/movements', methods=['GET'])
+@admin_required
+def get_movements():
+    """One page of stock movements, newest first; filter with ?product_id= (Admin only)"""
+    query = StockMovement.query
+    try:
+        if request.args.get('product_id'):
+            query = query.filter(StockMovement.product_id == int(request.args['product_id']))
+        limit = get_page_limit()
+        movements, next_cursor = keyset_paginate(query, [StockMovement.id], limit,
+                                                 after=request.args.get('after'), descending=True)
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
+    
+    return jsonify({'movements': [m.to_dict() for m in movements], 'next_cursor': next_cursor}), 200
+
+@bp.route('/stock-at', methods=['GET'])
+@admin_required
+def get_stock_at():
+    """Stock per product at a past moment (?at=ISO datetime, optional ?product_id=) (Admin only)"""
+    try:
+        at = datetime.fromisoformat(request.args['at'])
+        product_ids = [int(request.args['product_id'])] if request.args.get('product_id') else None
+    except KeyError:
+        return jsonify({'message': 'at is required'}), 400
+    except ValueError:
+        return jsonify({'message': 'at must be an ISO datetime and product_id an integer'}), 400
+    
+    stock = stock_at(at, product_ids)
+    return jsonify({
+        'at': at.isoformat(),
+        'stock': [{'product_id': product_id, 'stock': stock[product_id]} for product_id in sorted(stock)]
+    }), 200
@@ -1,24 +1,41 @@
-from flask import Blueprint, jsonify, request
+import csv
+import io
+import json
+from datetime import datetime, timedelta
+from flask import Blueprint, Response, current_app, jsonify, request, stream_with_context
 from app import db
+from app import idempotency
+from app.cache import catalog_cache
+from app.inventory import InsufficientStock, load_products, place_order, release_stock
+from app.order_import import FORMATS, import_orders
+from app.order_status import STATUSES, transition_orders
+from app.pagination import get_page_limit, keyset_paginate
+from app.reservations import take_holds
+from app.serialization import json_response
+from app.decorators import admin_required
+from app.events import publish_order, publish_stock
 from app.models import Order, OrderItem, Product, User
 from flask_jwt_extended import jwt_required, get_jwt_identity
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import joinedload, selectinload
 
 bp = Blueprint('orders', __name__)
 
-def is_admin():
-    """Helper function to check if current user is admin"""
-    try:
-        current_user_id = int(get_jwt_identity())
-        user = User.query.get(current_user_id)
-        return user and user.is_admin
-    except:
-        return False
-
 @bp.route('/', methods=['POST'])
 @jwt_required()
 def create_order():
     """Create a new order from cart items with STOCK CHECK"""
     current_user_id = int(get_jwt_identity())
+    
+    # A retried request carrying a known Idempotency-Key gets the original response back
+    idempotency_key = request.headers.get(idempotency.HEADER)
+    if idempotency_key is not None:
+        if not idempotency_key or len(idempotency_key) > idempotency.MAX_KEY_LENGTH:
+            return jsonify({'message': f'Invalid {idempotency.HEADER} header'}), 400
+        stored = idempotency.find_response(current_user_id, idempotency_key)
+        if stored:
+            return idempotency.replay(stored)
+    
     data = request.get_json()
     
     if not data or 'items' not in data:
@@ -31,14 +48,16 @@ def create_order():
     try:
         total_amount = 0
         order_items_data = []
-        products_to_update = []
+        quantities = {}
         
-        # VALIDATION PHASE
-        for item in cart_items:
-            if 'id' not in item or 'quantity' not in item:
-                continue
-                
-            product = Product.query.get(item['id'])
+        # VALIDATION PHASE (all cart products in one query)
+        lines = [item for item in cart_items if 'id' in item and 'quantity' in item]
+        products = load_products([int(item['id']) for item in lines])
+        # Units this user reserved count towards what they may buy
+        held = take_holds(current_user_id, list(products))
+        
+        for item in lines:
+            product = products.get(int(item['id']))
             if not product:
                 return jsonify({'message': f'Product with ID {item["id"]} not found'}), 404
             
@@ -46,10 +65,12 @@ def create_order():
             if quantity <= 0:
                 continue
                 
-            # Check Stock
-            if product.stock < quantity:
+            # Check Stock (fast fail; the conditional update below is authoritative)
+            available = product.available + held.get(product.id, 0)
+            if available < quantities.get(product.id, 0) + quantity:
+                db.session.rollback()
                 return jsonify({
-                    'message': f'Insufficient stock for {product.name}. Only {product.stock} left.'
+                    'message': f'Insufficient stock for {product.name}. Only {available} left.'
                 }), 400
             
             item_total = float(product.price) * quantity
@@ -58,87 +79,309 @@ def create_order():
             order_items_data.append({
                 'product_id': product.id,
                 'product_name': product.name,
+                'category': product.category,
                 'quantity': quantity,
                 'price': float(product.price)
             })
-            products_to_update.append((product, quantity))
+            quantities[product.id] = quantities.get(product.id, 0) + quantity
         
         if len(order_items_data) == 0:
+            db.session.rollback()
             return jsonify({'message': 'No valid items in cart'}), 400
         
         # EXECUTION PHASE
-        new_order = Order(
-            user_id=current_user_id,
-            total_amount=total_amount,
-            status='Pending'
-        )
-        db.session.add(new_order)
-        db.session.flush()
-        
-        # Create items and deduct stock
-        for item_data in order_items_data:
-            order_item = OrderItem(order_id=new_order.id, **item_data)
-            db.session.add(order_item)
-            
-        for product, quantity in products_to_update:
-            product.stock -= quantity
-            product.update_availability() # Update "In Stock" label
-        
-        db.session.commit()
+        # Stock (converting holds) is deducted before the inserts so row locks come first
+        new_order = place_order(current_user_id, order_items_data, quantities, products,
+                                {pid: qty for pid, qty in held.items() if pid in quantities})
+        release_stock({pid: qty for pid, qty in held.items() if pid not in quantities})
         
-        return jsonify({
+        result = {
             'message': 'Order placed successfully',
             'order_id': new_order.id,
             'total': total_amount
-        }), 201
+        }
+        if idempotency_key:
+            idempotency.remember_response(current_user_id, idempotency_key, new_order.id, 201, result)
+        
+        db.session.commit()
+        catalog_cache.bump()
+        publish_stock(set(quantities) | set(held))
+        publish_order(new_order.id, current_user_id, 'Pending')
+        
+        return jsonify(result), 201
         
+    except InsufficientStock as e:
+        db.session.rollback()
+        return jsonify({'message': str(e)}), 400
+    except IntegrityError as e:
+        db.session.rollback()
+        # A concurrent retry with the same key committed first: its order stands, ours is undone
+        stored = idempotency.find_response(current_user_id, idempotency_key) if idempotency_key else None
+        if stored:
+            return idempotency.replay(stored)
+        return jsonify({'message': f'Failed to create order: {str(e)}'}), 500
     except Exception as e:
         db.session.rollback()
         return jsonify({'message': f'Failed to create order: {str(e)}'}), 500
 
+@bp.route('/import', methods=['POST'])
+@admin_required
+def bulk_import_orders():
+    """
+    Bulk-import orders from a streamed CSV or NDJSON upload (Admin only).
+
+    Columns: user_email (or user_id), product_id, quantity and optional order_ref;
+    consecutive rows with the same order_ref become one order. Responds with one
+    NDJSON result per row, followed by a summary line.
+    """
+    fmt = request.args.get('format')
+    if fmt is None:
+        fmt = 'csv' if request.mimetype in ('text/csv', 'application/csv') else 'ndjson'
+    if fmt not in FORMATS:
+        return jsonify({'message': f'Invalid format. Allowed: {list(FORMATS)}'}), 400
+    
+    try:
+        batch_size = int(request.args.get('batch_size', current_app.config['IMPORT_BATCH_SIZE']))
+    except ValueError:
+        return jsonify({'message': 'batch_size must be an integer'}), 400
+    batch_size = max(1, min(batch_size, current_app.config['IMPORT_MAX_BATCH_SIZE']))
+    
+    def generate():
+        try:
+            for result in import_orders(request.stream, fmt, batch_size):
+                yield json.dumps(result) + '\n'
+        except Exception as e:
+            db.session.rollback()
+            yield json.dumps({'error': f'Import aborted: {str(e)}'}) + '\n'
+    
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
 @bp.route('/my-orders', methods=['GET'])
 @jwt_required()
 def get_my_orders():
-    """Get orders for the current user"""
+    """Get one page of the current user's orders, newest first"""
     current_user_id = int(get_jwt_identity())
-    orders = Order.query.filter_by(user_id=current_user_id).order_by(Order.created_at.desc()).all()
-    return jsonify([o.to_dict() for o in orders]), 200
+    # The (user_id, created_at) index serves filter and order; items come in one batched SELECT
+    query = Order.query.options(selectinload(Order.items)).filter(Order.user_id == current_user_id)
+    try:
+        limit = get_page_limit()
+        orders, next_cursor = keyset_paginate(query, [Order.created_at, Order.id], limit,
+                                              after=request.args.get('after'), descending=True)
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
+    
+    return jsonify({'orders': [o.to_dict() for o in orders], 'next_cursor': next_cursor}), 200
+
+def parse_date_arg(name, args):
+    """Read an ISO date/datetime argument, or None if absent"""
+    value = args.get(name)
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        raise ValueError(f'{name} must be an ISO date (YYYY-MM-DD)')
+
+def apply_order_filters(query, args=None):
+    """Apply ?status=&user_id=&date_from=&date_to= (or the same keys in `args`) to an Order query"""
+    args = request.args if args is None else args
+    if args.get('status'):
+        query = query.filter(Order.status == args['status'])
+    if args.get('user_id'):
+        try:
+            query = query.filter(Order.user_id == int(args['user_id']))
+        except (TypeError, ValueError):
+            raise ValueError('user_id must be an integer')
+    date_from = parse_date_arg('date_from', args)
+    if date_from:
+        query = query.filter(Order.created_at >= date_from)
+    date_to = parse_date_arg('date_to', args)
+    if date_to:
+        # A bare date means "through the end of that day"
+        if len(args['date_to']) == 10:
+            date_to += timedelta(days=1)
+            query = query.filter(Order.created_at < date_to)
+        else:
+            query = query.filter(Order.created_at <= date_to)
+    return query
 
 @bp.route('/', methods=['GET'])
-@jwt_required()
+@admin_required
 def get_all_orders():
-    """Get all orders (Admin only)"""
-    if not is_admin():
-        return jsonify({'message': 'Admin access required'}), 403
-        
-    orders = Order.query.order_by(Order.created_at.desc()).all()
+    """Get one page of orders, newest first (Admin only)"""
+    # Customer joined in, items fetched in one batched SELECT: constant query count per page
+    query = Order.query.options(joinedload(Order.customer), selectinload(Order.items))
+    try:
+        limit = get_page_limit()
+        orders, next_cursor = keyset_paginate(apply_order_filters(query), [Order.created_at, Order.id], limit,
+                                              after=request.args.get('after'), descending=True)
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
+    
     # Enrich with user details for admin view
-    result = []
-    for o in orders:
+    def serialize(o):
         data = o.to_dict()
-        user = User.query.get(o.user_id)
+        user = o.customer
         data['user_email'] = user.email if user else 'Unknown'
         data['user_name'] = user.full_name if user else 'Unknown'
-        result.append(data)
+        return data
         
-    return jsonify(result), 200
+    # A bounded, already loaded page: buffered, so it keeps the SQL timing headers and strict N+1 check
+    return json_response({'orders': [serialize(o) for o in orders], 'next_cursor': next_cursor}), 200
+
+EXPORT_FORMATS = {'csv': 'text/csv', 'ndjson': 'application/x-ndjson'}
+
+EXPORT_COLUMNS = [
+    ('order_id', Order.id),
+    ('created_at', Order.created_at),
+    ('status', Order.status),
+    ('total_amount', Order.total_amount),
+    ('user_id', Order.user_id),
+    ('user_email', User.email),
+    ('user_name', User.full_name),
+    ('product_id', OrderItem.product_id),
+    ('product_name', OrderItem.product_name),
+    ('quantity', OrderItem.quantity),
+    ('price', OrderItem.price),
+]
+
+@bp.route('/export', methods=['GET'])
+@admin_required
+def export_orders():
+    """
+    Stream every order item with its order and customer as CSV or NDJSON (Admin only).
+
+    Same filters as the order list. Rows come off a server-side cursor in chunks of
+    EXPORT_YIELD_PER, so memory stays flat for multi-year exports.
+    """
+    fmt = request.args.get('format', 'csv')
+    if fmt not in EXPORT_FORMATS:
+        return jsonify({'message': f'Invalid format. Allowed: {list(EXPORT_FORMATS)}'}), 400
+    
+    names = [name for name, _ in EXPORT_COLUMNS]
+    query = db.select(*[column for _, column in EXPORT_COLUMNS]) \
+        .select_from(Order) \
+        .join(User, User.id == Order.user_id) \
+        .outerjoin(OrderItem, OrderItem.order_id == Order.id) \
+        .order_by(Order.id, OrderItem.id)
+    try:
+        query = apply_order_filters(query)
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
+    
+    def generate():
+        rows = db.session.execute(query.execution_options(yield_per=current_app.config['EXPORT_YIELD_PER']))
+        for chunk in rows.partitions():
+            chunk = [[v.isoformat() if isinstance(v, datetime) else v for v in row] for row in chunk]
+            if fmt == 'csv':
+                buffer = io.StringIO()
+                csv.writer(buffer).writerows(chunk)
+                yield buffer.getvalue()
+            else:
+                yield ''.join(json.dumps(dict(zip(names, row))) + '\n' for row in chunk)
+    
+    def generate_csv():
+        buffer = io.StringIO()
+        csv.writer(buffer).writerow(names)
+        yield buffer.getvalue()
+        yield from generate()
+    
+    filename = f'orders-{datetime.utcnow():%Y%m%d-%H%M%S}.{fmt}'
+    return Response(
+        stream_with_context(generate_csv() if fmt == 'csv' else generate()),
+        mimetype=EXPORT_FORMATS[fmt],
+        headers={'Content-Disposition': f'attachment; filename={filename}'}
+    )
 
 @bp.route('/<int:id>/status', methods=['PATCH'])
-@jwt_required()
+@admin_required
 def update_order_status(id):
     """Update order status (Admin only)"""
-    if not is_admin():
-        return jsonify({'message': 'Admin access required'}), 403
-    
     data = request.get_json()
     status = data.get('status')
     
-    allowed_statuses = ['Pending', 'Processing', 'Shipped', 'Delivered', 'Cancelled']
-    if status not in allowed_statuses:
-        return jsonify({'message': f'Invalid status. Allowed: {allowed_statuses}'}), 400
-        
+    if status not in STATUSES:
+        return jsonify({'message': f'Invalid status. Allowed: {list(STATUSES)}'}), 400
+    
     order = Order.query.get_or_404(id)
-    order.status = status
-    db.session.commit()
+    try:
+        moved, rejected, restocked = transition_orders([Order.id == order.id], status, int(get_jwt_identity()))
+        if rejected:
+            db.session.rollback()
+            return jsonify({'message': f'Cannot change order status from {order.status} to {status}'}), 400
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'message': f'Failed to update order status: {str(e)}'}), 500
+    
+    if moved:
+        catalog_cache.bump()
+        publish_stock(restocked)
+        publish_order(order.id, order.user_id, status)
     
     return jsonify({'message': f'Order status updated to {status}', 'order': order.to_dict()}), 200
+
+@bp.route('/status', methods=['PATCH'])
+@admin_required
+def bulk_update_order_status():
+    """
+    Move many orders along the status workflow at once (Admin only).
+
+    Body: {"status": "Shipped", "ids": [...]} or {"status": ..., "filter": {...}} with
+    the order list filters, or {"transitions": [...]} of several such objects. Each
+    transition is one set-based UPDATE, and everything commits together. Orders not
+    allowed to move are reported and left alone.
+    """
+    data = request.get_json() or {}
+    transitions = data.get('transitions', [data])
+    if not isinstance(transitions, list) or not transitions:
+        return jsonify({'message': 'transitions must be a non-empty list'}), 400
+    
+    criteria = []
+    for transition in transitions:
+        status = transition.get('status') if isinstance(transition, dict) else None
+        if status not in STATUSES:
+            return jsonify({'message': f'Invalid status. Allowed: {list(STATUSES)}'}), 400
+        if 'ids' in transition:
+            try:
+                ids = {int(order_id) for order_id in transition['ids']}
+            except (TypeError, ValueError):
+                return jsonify({'message': 'ids must be a list of integers'}), 400
+            criteria.append((status, ids, [Order.id.in_(ids)]))
+        elif isinstance(transition.get('filter'), dict) and transition['filter']:
+            try:
+                query = apply_order_filters(db.select(Order.id), transition['filter'])
+            except ValueError as e:
+                return jsonify({'message': str(e)}), 400
+            criteria.append((status, None, [Order.id.in_(query)]))
+        else:
+            return jsonify({'message': 'Each transition needs ids or a non-empty filter'}), 400
+    
+    limit = current_app.config['ORDER_STATUS_BULK_LIMIT']
+    updated, rejected, not_found, restocked, moved_orders = {}, [], [], {}, []
+    try:
+        for status, ids, condition in criteria:
+            moved, refused, returned = transition_orders(condition, status, int(get_jwt_identity()), limit)
+            updated[status] = updated.get(status, 0) + len(moved)
+            rejected.extend({'id': row.id, 'status': row.status, 'wanted': status} for row in refused)
+            if ids is not None:
+                found = db.session.query(Order.id).filter(Order.id.in_(ids)).all()
+                not_found.extend(sorted(ids - {order_id for (order_id,) in found}))
+            for product_id, quantity in returned.items():
+                restocked[product_id] = restocked.get(product_id, 0) + quantity
+            moved_orders.extend((row.id, row.user_id, status) for row in moved)
+        db.session.commit()
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({'message': str(e)}), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'message': f'Failed to update order statuses: {str(e)}'}), 500
+    
+    if moved_orders:
+        catalog_cache.bump()
+        publish_stock(restocked)
+        for order_id, user_id, status in moved_orders:
+            publish_order(order_id, user_id, status)
+    
+    return jsonify({'updated': updated, 'rejected': rejected, 'not_found': not_found}), 200
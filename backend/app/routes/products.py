@@ -1,38 +1,115 @@
 from flask import Blueprint, jsonify, request
 from app import db
-from app.models import Product, User
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from app.cache import cached_catalog_response, catalog_cache
+from app.decorators import admin_required
+from app.events import broker, publish_stock
+from app.ledger import record_movements
+from app.models import Product, StockMovement, StockReservation, StockSnapshot, StockThreshold
+from app.pagination import get_page_limit, keyset_paginate
+from app.search import search_index
+from app.serialization import json_response
+from flask_jwt_extended import get_jwt_identity
 
 bp = Blueprint('products', __name__)
 
-def is_admin():
-    """Helper function to check if current user is admin"""
+# Sortable columns for ?sort= (prefix with "-" for descending); id breaks ties
+SORT_KEYS = {
+    'id': Product.id,
+    'name': Product.name,
+    'price': Product.price,
+}
+
+def apply_product_filters(query, args, skip=None):
+    """Apply ?category=&availability=&min_price=&max_price= to a Product query (retired products never match)"""
+    query = query.filter(Product.active)
+    if skip != 'category' and args.get('category'):
+        query = query.filter(Product.category == args['category'])
+    if skip != 'availability' and args.get('availability'):
+        query = query.filter(Product.availability == args['availability'])
     try:
-        current_user_id = int(get_jwt_identity())
-        user = User.query.get(current_user_id)
-        return user and user.is_admin
-    except:
-        return False
+        if args.get('min_price'):
+            query = query.filter(Product.price >= float(args['min_price']))
+        if args.get('max_price'):
+            query = query.filter(Product.price <= float(args['max_price']))
+    except ValueError:
+        raise ValueError('min_price and max_price must be numbers')
+    return query
+
+def product_facets(args):
+    """Counts per category and availability for the current filters (each facet ignores its own filter)"""
+    facets = {}
+    for name, column in (('category', Product.category), ('availability', Product.availability)):
+        rows = apply_product_filters(db.session.query(column, db.func.count(Product.id)), args, skip=name) \
+            .group_by(column).all()
+        facets[name] = {value: count for value, count in rows}
+    return facets
 
 @bp.route('/', methods=['GET'])
+@cached_catalog_response
 def get_products():
-    """Get all products"""
-    products = Product.query.all()
-    return jsonify([p.to_dict() for p in products]), 200
+    """Get one page of products (?limit=&after=), filtered and sorted in SQL"""
+    sort = request.args.get('sort', 'id')
+    descending = sort.startswith('-')
+    sort_column = SORT_KEYS.get(sort.lstrip('-'))
+    if sort_column is None:
+        return jsonify({'message': f'Invalid sort. Allowed: {list(SORT_KEYS)}'}), 400
+    columns = [Product.id] if sort_column is Product.id else [sort_column, Product.id]
+
+    try:
+        limit = get_page_limit()
+        query = apply_product_filters(Product.query, request.args)
+        products, next_cursor = keyset_paginate(query, columns, limit,
+                                                after=request.args.get('after'),
+                                                descending=descending)
+        result = {
+            'products': [p.to_dict() for p in products],
+            'next_cursor': next_cursor
+        }
+        if request.args.get('facets', '').lower() in ('1', 'true'):
+            result['facets'] = product_facets(request.args)
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
+
+    # One bounded page, kept whole by the catalog cache, so there is nothing to stream
+    return json_response(result), 200
+
+@bp.route('/search', methods=['GET'])
+@cached_catalog_response
+def search_products():
+    """Full-text search over name, specs and description (?q=&limit=), best match first"""
+    query = request.args.get('q', '').strip()
+    if not query:
+        return jsonify({'message': 'Search query (q) required'}), 400
+
+    try:
+        limit = get_page_limit()
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
+
+    ranked = search_index.search(query, limit)
+    ids = [product_id for product_id, _ in ranked]
+    products = {p.id: p for p in Product.query.filter(Product.id.in_(ids), Product.active)} if ids else {}
+
+    results = []
+    for product_id, score in ranked:
+        if product_id in products:
+            data = products[product_id].to_dict()
+            data['score'] = round(score, 4)
+            results.append(data)
+
+    return jsonify({'query': query, 'products': results}), 200
 
 @bp.route('/<int:id>', methods=['GET'])
+@cached_catalog_response
 def get_product(id):
     """Get single product by ID"""
-    product = Product.query.get_or_404(id)
+    product = Product.query.filter_by(id=id, active=True).first_or_404()
     return jsonify(product.to_dict()), 200
 
 @bp.route('/', methods=['POST'])
-@jwt_required()
+@admin_required
 def create_product():
     """Create new product (Admin only)"""
-    if not is_admin():
-        return jsonify({'message': 'Admin access required'}), 403
-    
     data = request.get_json()
     
     # Validate required fields
@@ -54,7 +131,11 @@ def create_product():
         new_product.update_availability()
         
         db.session.add(new_product)
+        db.session.flush()
+        record_movements('adjustment', [(None, new_product.id, new_product.stock)], int(get_jwt_identity()))
         db.session.commit()
+        search_index.add(new_product)
+        catalog_cache.bump()
         
         return jsonify({
             'message': 'Product created successfully',
@@ -65,14 +146,13 @@ def create_product():
         return jsonify({'message': f'Failed to create product: {str(e)}'}), 500
 
 @bp.route('/<int:id>', methods=['PUT'])
-@jwt_required()
+@admin_required
 def update_product(id):
     """Update product (Admin only)"""
-    if not is_admin():
-        return jsonify({'message': 'Admin access required'}), 403
-    
-    product = Product.query.get_or_404(id)
+    # Locked so the logged stock movement matches what is overwritten
+    product = Product.query.filter_by(id=id, active=True).with_for_update().first_or_404()
     data = request.get_json()
+    previous_stock = product.stock or 0
     
     try:
         # Update fields if provided
@@ -96,8 +176,12 @@ def update_product(id):
             product.warranty = data['warranty']
         if 'stock' in data or 'availability' not in data:
             product.update_availability()
+        record_movements('adjustment', [(None, product.id, product.stock - previous_stock)], int(get_jwt_identity()))
         
         db.session.commit()
+        search_index.add(product)
+        catalog_cache.bump()
+        broker.publish('product', product.to_dict)
         
         return jsonify({
             'message': 'Product updated successfully',
@@ -108,24 +192,26 @@ def update_product(id):
         return jsonify({'message': f'Failed to update product: {str(e)}'}), 500
 
 @bp.route('/<int:id>/stock', methods=['PATCH'])
-@jwt_required()
+@admin_required
 def update_stock(id):
     """Update product stock (Admin only)"""
-    if not is_admin():
-        return jsonify({'message': 'Admin access required'}), 403
-    
-    product = Product.query.get_or_404(id)
+    # Locked so the logged stock movement matches what is overwritten
+    product = Product.query.filter_by(id=id, active=True).with_for_update().first_or_404()
     data = request.get_json()
     
     if 'stock' not in data:
         return jsonify({'message': 'Stock value required'}), 400
     
     try:
+        previous_stock = product.stock or 0
         product.stock = int(data['stock'])
         
         product.update_availability()
+        record_movements('adjustment', [(None, product.id, product.stock - previous_stock)], int(get_jwt_identity()))
         
         db.session.commit()
+        catalog_cache.bump()
+        publish_stock([product.id])
         
         return jsonify({
             'message': 'Stock updated successfully',
@@ -136,19 +222,35 @@ def update_stock(id):
         return jsonify({'message': f'Failed to update stock: {str(e)}'}), 500
 
 @bp.route('/<int:id>', methods=['DELETE'])
-@jwt_required()
+@admin_required
 def delete_product(id):
-    """Delete product (Admin only)"""
-    if not is_admin():
-        return jsonify({'message': 'Admin access required'}), 403
-    
-    product = Product.query.get_or_404(id)
+    """Delete product (Admin only); one with stock history is retired instead so the ledger stays whole"""
+    product = Product.query.filter_by(id=id, active=True).with_for_update().first_or_404()
+    has_history = db.session.query(StockMovement.id).filter_by(product_id=id).first() is not None \
+        or db.session.query(StockSnapshot.id).filter_by(product_id=id).first() is not None
     
     try:
-        db.session.delete(product)
+        StockReservation.query.filter_by(product_id=id).delete()
+        StockThreshold.query.filter_by(product_id=id).delete()
+        if has_history:
+            # Write the remaining stock off as its last movement and hide it from the catalog
+            remaining = product.stock or 0
+            product.stock = 0
+            product.reserved = 0
+            product.active = False
+            product.update_availability()
+            record_movements('removal', [(None, product.id, -remaining)], int(get_jwt_identity()))
+            message = 'Product retired; its stock history is kept'
+        else:
+            db.session.delete(product)
+            message = 'Product deleted successfully'
         db.session.commit()
+        search_index.remove(id)
+        catalog_cache.bump()
+        if has_history:
+            publish_stock([id])
         
-        return jsonify({'message': 'Product deleted successfully'}), 200
+        return jsonify({'message': message}), 200
     except Exception as e:
         db.session.rollback()
         return jsonify({'message': f'Failed to delete product: {str(e)}'}), 500
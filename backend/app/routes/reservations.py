@@ -0,0 +1,81 @@
+from flask import Blueprint, jsonify, request
+from app import db
+from app.cache import catalog_cache
+from app.inventory import InsufficientStock
+from app.models import StockReservation
+from app.reservations import release_hold, set_holds, sweep_expired
+from flask_jwt_extended import jwt_required, get_jwt_identity
+
+bp = Blueprint('reservations', __name__)
+
+@bp.route('/', methods=['POST'])
+@jwt_required()
+def reserve():
+    """Hold stock for cart items (quantity 0 drops a hold); holds expire after RESERVATION_TTL"""
+    current_user_id = int(get_jwt_identity())
+    data = request.get_json()
+    
+    if not data or not data.get('items'):
+        return jsonify({'message': 'No items provided'}), 400
+    
+    try:
+        quantities = {}
+        for item in data['items']:
+            if 'id' not in item or 'quantity' not in item:
+                continue
+            quantity = int(item['quantity'])
+            if quantity < 0:
+                return jsonify({'message': 'Quantity cannot be negative'}), 400
+            quantities[int(item['id'])] = quantity
+    except (TypeError, ValueError):
+        return jsonify({'message': 'Item id and quantity must be integers'}), 400
+    
+    if not quantities:
+        return jsonify({'message': 'No valid items provided'}), 400
+    
+    # Free expired holds first so they do not block this request
+    sweep_expired()
+    
+    try:
+        holds = set_holds(current_user_id, quantities)
+        db.session.commit()
+        catalog_cache.bump()
+        
+        return jsonify({
+            'message': 'Stock reserved',
+            'reservations': [h.to_dict() for h in holds]
+        }), 201
+    except LookupError as e:
+        db.session.rollback()
+        return jsonify({'message': str(e)}), 404
+    except InsufficientStock as e:
+        db.session.rollback()
+        return jsonify({'message': str(e)}), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'message': f'Failed to reserve stock: {str(e)}'}), 500
+
+@bp.route('/', methods=['GET'])
+@jwt_required()
+def get_my_reservations():
+    """Get the current user's stock holds"""
+    current_user_id = int(get_jwt_identity())
+    holds = StockReservation.query.filter_by(user_id=current_user_id).all()
+    return jsonify([h.to_dict() for h in holds]), 200
+
+@bp.route('/<int:id>', methods=['DELETE'])
+@jwt_required()
+def release(id):
+    """Release one of the current user's holds"""
+    current_user_id = int(get_jwt_identity())
+    hold = StockReservation.query.filter_by(id=id, user_id=current_user_id).first_or_404()
+    
+    try:
+        release_hold(hold)
+        db.session.commit()
+        catalog_cache.bump()
+        
+        return jsonify({'message': 'Reservation released'}), 200
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'message': f'Failed to release reservation: {str(e)}'}), 500
@@ -0,0 +1,122 @@
+"""In-process full-text index over product name, specs and description"""
+import heapq
+import math
+import re
+import threading
+from collections import Counter, defaultdict
+
+from app import db
+
+TOKEN_RE = re.compile(r'[a-z0-9]+')
+
+# A hit in the name counts more than one buried in the description
+FIELD_WEIGHTS = {
+    'name': 3.0,
+    'specs': 1.5,
+    'description': 1.0,
+}
+
+# BM25 tuning constants
+K1 = 1.2
+B = 0.75
+
+
+def tokenize(text):
+    return TOKEN_RE.findall(text.lower()) if text else []
+
+
+class ProductSearchIndex:
+    """
+    Inverted index mapping each term to the products containing it, ranked with BM25.
+
+    The index is built once per process on first use and then kept current by the
+    product write routes calling add()/remove() after they commit.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._postings = defaultdict(dict)  # term -> {product_id: weighted term frequency}
+        self._doc_terms = {}                # product_id -> {term: weighted term frequency}
+        self._doc_lengths = {}              # product_id -> weighted token count
+        self._total_length = 0.0
+        self._built = False
+
+    def _index_fields(self, product_id, fields):
+        weights = Counter()
+        for field, weight in FIELD_WEIGHTS.items():
+            for term in tokenize(fields.get(field)):
+                weights[term] += weight
+
+        for term, tf in weights.items():
+            self._postings[term][product_id] = tf
+        self._doc_terms[product_id] = dict(weights)
+        length = sum(weights.values())
+        self._doc_lengths[product_id] = length
+        self._total_length += length
+
+    def _unindex(self, product_id):
+        terms = self._doc_terms.pop(product_id, None)
+        if terms is None:
+            return
+        for term in terms:
+            postings = self._postings[term]
+            postings.pop(product_id, None)
+            if not postings:
+                del self._postings[term]
+        self._total_length -= self._doc_lengths.pop(product_id)
+
+    def build(self):
+        """Load every product once; later changes arrive through add()/remove()"""
+        from app.models import Product
+
+        with self._lock:
+            if self._built:
+                return
+            rows = db.session.query(Product.id, Product.name, Product.specs, Product.description) \
+                .filter(Product.active)
+            for product_id, name, specs, description in rows:
+                self._index_fields(product_id, {'name': name, 'specs': specs, 'description': description})
+            self._built = True
+
+    def add(self, product):
+        """Index (or re-index) a committed product"""
+        with self._lock:
+            if not self._built:
+                return
+            self._unindex(product.id)
+            self._index_fields(product.id, {
+                'name': product.name,
+                'specs': product.specs,
+                'description': product.description,
+            })
+
+    def remove(self, product_id):
+        with self._lock:
+            if self._built:
+                self._unindex(product_id)
+
+    def search(self, query, limit):
+        """Return [(product_id, score)] for the best `limit` matches, best first"""
+        self.build()
+        terms = set(tokenize(query))
+
+        with self._lock:
+            doc_count = len(self._doc_terms)
+            if not terms or not doc_count:
+                return []
+            avg_length = self._total_length / doc_count
+
+            scores = defaultdict(float)
+            for term in terms:
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (doc_count - len(postings) + 0.5) / (len(postings) + 0.5))
+                for product_id, tf in postings.items():
+                    norm = K1 * (1 - B + B * self._doc_lengths[product_id] / avg_length)
+                    scores[product_id] += idf * tf * (K1 + 1) / (tf + norm)
+
+        return heapq.nlargest(limit, scores.items(), key=lambda item: (item[1], -item[0]))
+
+
+search_index = ProductSearchIndex()
@@ -0,0 +1,108 @@
+"""JSON encoding for list endpoints: orjson when installed, and arrays streamed row by row"""
+import itertools
+import json
+import re
+from datetime import date, datetime
+from decimal import Decimal
+
+from flask import current_app, stream_with_context
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; the json module produces the same documents, slower
+    orjson = None
+
+
+def _default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError(f'Object of type {type(value).__name__} is not JSON serializable')
+
+
+_NON_ASCII = re.compile(rb'[\x80-\xff]+')
+
+
+def _escape_non_ascii(match):
+    return json.dumps(match.group().decode('utf-8'))[1:-1].encode('ascii')
+
+
+# Keys sorted and non-ASCII escaped like Flask's default provider, so these documents
+# are byte for byte what jsonify() produces
+if orjson is not None:
+    def dumps(value):
+        """Encode `value` as compact, ASCII-only JSON with sorted keys"""
+        data = orjson.dumps(value, default=_default, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SORT_KEYS)
+        # orjson always writes UTF-8; multi-byte runs only occur inside strings
+        return data if data.isascii() else _NON_ASCII.sub(_escape_non_ascii, data)
+else:
+    _encoder = json.JSONEncoder(default=_default, separators=(',', ':'), sort_keys=True)
+
+    def dumps(value):
+        """Encode `value` as compact, ASCII-only JSON with sorted keys"""
+        return _encoder.encode(value).encode('ascii')
+
+
+class JSONArray:
+    """
+    A JSON array encoded one row at a time as `rows` is iterated: each row goes through
+    `serialize` (normally the model's to_dict), so neither a list of every row's dict
+    nor the whole document is built. `rows` may be a list or a query iterator.
+    """
+
+    def __init__(self, rows, serialize):
+        self.rows = rows
+        self.serialize = serialize
+
+    def __iter__(self):
+        yield b'['
+        separator = b''
+        for row in self.rows:
+            yield separator + dumps(self.serialize(row))
+            separator = b','
+        yield b']'
+
+
+def iter_json(value):
+    """Encode `value` in pieces; a JSONArray, on its own or as a value of a dict, is streamed"""
+    if isinstance(value, JSONArray):
+        yield from value
+    elif isinstance(value, dict):
+        yield b'{'
+        separator = b''
+        for key, item in sorted(value.items(), key=lambda pair: str(pair[0])):
+            yield separator + dumps(str(key)) + b':'
+            if isinstance(item, JSONArray):
+                yield from item
+            else:
+                yield dumps(item)
+            separator = b','
+        yield b'}'
+    else:
+        yield dumps(value)
+
+
+def _chunked(pieces, size):
+    """Join small pieces into writes of about `size` bytes"""
+    buffer, buffered = [], 0
+    for piece in pieces:
+        buffer.append(piece)
+        buffered += len(piece)
+        if buffered >= size:
+            yield b''.join(buffer)
+            buffer, buffered = [], 0
+    if buffer:
+        yield b''.join(buffer)
+
+
+def json_response(value):
+    """A buffered application/json response for `value`, for bodies that are cached whole"""
+    return current_app.response_class(dumps(value) + b'\n', mimetype='application/json')
+
+
+def json_stream(value):
+    """A streamed application/json response for `value` (see iter_json)"""
+    pieces = itertools.chain(iter_json(value), [b'\n'])
+    chunks = _chunked(pieces, current_app.config['JSON_STREAM_CHUNK'])
+    return current_app.response_class(stream_with_context(chunks), mimetype='application/json')
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Response compression benchmark: payload size and CPU cost per encoding and level.
+
+Runs against a throwaway SQLite database, never the configured one. The seed.py catalog
+is cloned up to --products products and --orders orders of three items are placed, then
+full pages of GET /api/products/ and GET /api/orders/ and the streamed ndjson export are
+fetched with each Accept-Encoding / level. For each it reports the bytes on the wire,
+the compression ratio, the CPU time spent compressing one body and the mean request time.
+
+    python bench_compression.py --products 600 --orders 400 --repeat 20
+"""
+
+import argparse
+import gzip
+import os
+import statistics
+import tempfile
+import time
+
+from app import create_app, db
+from app.compression import brotli
+from app.models import Order, OrderItem, Product, User
+from config import Config
+from seed import seed_products
+
+ENDPOINTS = [
+    ('products', '/api/products/?limit=200'),
+    ('orders', '/api/orders/?limit=200'),
+    ('export', '/api/orders/export?format=ndjson'),
+]
+
+def build_app(products, orders):
+    db_path = os.path.join(tempfile.mkdtemp(), 'bench.db')
+
+    class BenchConfig(Config):
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{db_path}'
+        BCRYPT_LOG_ROUNDS = 4
+        RATELIMIT_ENABLED = False
+
+    app = create_app(BenchConfig)
+    with app.app_context():
+        db.create_all()
+        seed_products()
+        seeded = Product.query.all()
+        for i in range(len(seeded), products):
+            source = seeded[i % len(seeded)]
+            db.session.add(Product(
+                name=f'{source.name} #{i}', category=source.category, price=source.price,
+                specs=source.specs, description=source.description, warranty=source.warranty,
+                availability=source.availability, image_url=source.image_url, stock=50
+            ))
+        admin = User(full_name='Bench Admin', email='admin@bench.com', is_admin=True)
+        admin.set_password('bench-password')
+        customer = User(full_name='Bench Customer', email='customer@bench.com')
+        customer.set_password('bench-password')
+        db.session.add_all([admin, customer])
+        db.session.commit()
+
+        catalog = Product.query.order_by(Product.id).all()
+        for i in range(orders):
+            lines = [catalog[(i * 3 + k) % len(catalog)] for k in range(3)]
+            order = Order(user_id=customer.id, status='Pending',
+                          total_amount=sum(product.price for product in lines))
+            db.session.add(order)
+            db.session.flush()
+            db.session.add_all(OrderItem(order_id=order.id, product_id=product.id,
+                                         product_name=product.name, quantity=1, price=product.price)
+                               for product in lines)
+        db.session.commit()
+    return app
+
+def settings():
+    yield 'identity', None, None
+    for level in (1, 6, 9):
+        yield f'gzip-{level}', 'gzip', level
+    if brotli is not None:
+        for level in (1, 4, 11):
+            yield f'br-{level}', 'br', level
+
+def compress_cpu_ms(body, encoding, level, repeat):
+    if encoding is None:
+        return 0.0
+    started = time.process_time()
+    for _ in range(repeat):
+        if encoding == 'br':
+            brotli.compress(body, quality=level)
+        else:
+            gzip.compress(body, compresslevel=level, mtime=0)
+    return (time.process_time() - started) / repeat * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--products', type=int, default=600)
+    parser.add_argument('--orders', type=int, default=400)
+    parser.add_argument('--repeat', type=int, default=20, help='requests per endpoint and setting')
+    args = parser.parse_args()
+
+    app = build_app(args.products, args.orders)
+    client = app.test_client()
+    token = client.post('/api/auth/login', json={
+        'email': 'admin@bench.com', 'password': 'bench-password'
+    }).get_json()['access_token']
+
+    print("=" * 78)
+    print(f"COMPRESSION BENCHMARK  products={args.products} orders={args.orders} repeat={args.repeat}"
+          f"{'' if brotli else '  (brotli not installed)'}")
+    print("=" * 78)
+    print(f"{'endpoint':<10} {'setting':<9} {'bytes':>10} {'ratio':>7} {'cpu ms':>8} {'request ms':>11}")
+    for name, url in ENDPOINTS:
+        raw = client.get(url, headers={'Authorization': f'Bearer {token}'}).get_data()
+        for label, encoding, level in settings():
+            if encoding == 'br':
+                app.config['COMPRESS_BR_LEVEL'] = level
+            elif encoding == 'gzip':
+                app.config['COMPRESS_LEVEL'] = level
+            headers = {'Authorization': f'Bearer {token}', 'Accept-Encoding': encoding or 'identity'}
+
+            timings, size = [], 0
+            for _ in range(args.repeat):
+                started = time.perf_counter()
+                response = client.get(url, headers=headers)
+                size = len(response.get_data())
+                timings.append(time.perf_counter() - started)
+                assert response.headers.get('Content-Encoding') == encoding, (url, label)
+
+            cpu_ms = compress_cpu_ms(raw, encoding, level, args.repeat)
+            print(f"{name:<10} {label:<9} {size:>10} {len(raw) / size:>6.1f}x {cpu_ms:>8.2f} "
+                  f"{statistics.mean(timings) * 1000:>11.2f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Login throughput benchmark at different bcrypt cost factors.
+
+Runs against a throwaway SQLite database, never the configured one. For each cost it
+fires concurrent logins through the password pool and reports successful logins per
+second, mean latency and how many requests were shed with 503.
+
+    python bench_login.py --costs 8 10 12 --clients 16 --requests 64
+"""
+
+import argparse
+import os
+import statistics
+import tempfile
+import threading
+import time
+
+from app import create_app, db
+from app.models import User
+from config import Config
+
+def bench_cost(cost, clients, requests_per_cost, workers, queue_depth):
+    db_path = os.path.join(tempfile.mkdtemp(), 'bench.db')
+
+    class BenchConfig(Config):
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{db_path}'
+        BCRYPT_LOG_ROUNDS = cost
+        PASSWORD_HASH_WORKERS = workers
+        PASSWORD_HASH_QUEUE_DEPTH = queue_depth
+
+    app = create_app(BenchConfig)
+    with app.app_context():
+        db.create_all()
+        user = User(full_name="Bench User", email="bench@user.com")
+        user.set_password("bench-password")
+        db.session.add(user)
+        db.session.commit()
+
+    latencies = []
+    statuses = []
+    lock = threading.Lock()
+    remaining = [requests_per_cost]
+
+    def client_loop():
+        client = app.test_client()
+        while True:
+            with lock:
+                if remaining[0] == 0:
+                    return
+                remaining[0] -= 1
+            start = time.perf_counter()
+            response = client.post('/api/auth/login',
+                                   json={'email': 'bench@user.com', 'password': 'bench-password'})
+            elapsed = time.perf_counter() - start
+            with lock:
+                statuses.append(response.status_code)
+                latencies.append(elapsed)
+
+    threads = [threading.Thread(target=client_loop) for _ in range(clients)]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - started
+
+    ok = statuses.count(200)
+    return {
+        'cost': cost,
+        'logins_per_sec': ok / wall,
+        'mean_ms': statistics.mean(latencies) * 1000,
+        'p95_ms': sorted(latencies)[int(len(latencies) * 0.95) - 1] * 1000,
+        'ok': ok,
+        'shed': statuses.count(503),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--costs', type=int, nargs='+', default=[8, 10, 12])
+    parser.add_argument('--clients', type=int, default=16, help='concurrent login clients')
+    parser.add_argument('--requests', type=int, default=64, help='logins per cost factor')
+    parser.add_argument('--workers', type=int, default=Config.PASSWORD_HASH_WORKERS)
+    parser.add_argument('--queue-depth', type=int, default=Config.PASSWORD_HASH_QUEUE_DEPTH)
+    args = parser.parse_args()
+
+    print("=" * 72)
+    print(f"LOGIN BENCHMARK  clients={args.clients} requests={args.requests} "
+          f"workers={args.workers} queue={args.queue_depth}")
+    print("=" * 72)
+    print(f"{'cost':>4} {'logins/s':>10} {'mean ms':>10} {'p95 ms':>10} {'ok':>6} {'503':>6}")
+    for cost in args.costs:
+        r = bench_cost(cost, args.clients, args.requests, args.workers, args.queue_depth)
+        print(f"{r['cost']:>4} {r['logins_per_sec']:>10.1f} {r['mean_ms']:>10.1f} "
+              f"{r['p95_ms']:>10.1f} {r['ok']:>6} {r['shed']:>6}")
+
+if __name__ == '__main__':
+    main()
@@ -1,5 +1,7 @@
 import os
 
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
 class Config:
     # Generate a secure random key for production use
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'dev-secret-key-change-in-production'
@@ -14,3 +16,101 @@ class Config:
     # JWT Configuration
     JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY') or 'jwt-secret-key-change-this'
     JWT_ACCESS_TOKEN_EXPIRES = 3600  # 1 hour
+
+    # Password hashing: bcrypt cost (hashes are upgraded on login when it changes)
+    # and the bounded pool that runs it; overflow gets a fast 503
+    BCRYPT_LOG_ROUNDS = int(os.environ.get('BCRYPT_LOG_ROUNDS', 12))
+    PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', 2))
+    PASSWORD_HASH_QUEUE_DEPTH = int(os.environ.get('PASSWORD_HASH_QUEUE_DEPTH', 8))
+    PASSWORD_HASH_TIMEOUT = 10  # seconds
+
+    # Keyset pagination for list endpoints
+    PAGE_SIZE = 50
+    MAX_PAGE_SIZE = 200
+
+    # Catalog response cache (per process; writes clear it, the TTL bounds cross-worker staleness)
+    CATALOG_CACHE_TTL = 30  # seconds
+    CATALOG_CACHE_SIZE = 512  # cached responses
+
+    # Idempotency-Key records for POST /api/orders/ (purge with `flask purge-idempotency-keys`)
+    IDEMPOTENCY_KEY_TTL = 24 * 3600  # seconds
+
+    # Cart stock reservations (release expired holds with `flask sweep-reservations`)
+    RESERVATION_TTL = 15 * 60  # seconds
+    RESERVATION_SWEEP_BATCH = 500
+
+    # Bulk order import (POST /api/orders/import): orders committed per transaction
+    IMPORT_BATCH_SIZE = 100
+    IMPORT_MAX_BATCH_SIZE = 1000
+
+    # Bulk status changes (PATCH /api/orders/status): most orders one transition may lock
+    ORDER_STATUS_BULK_LIMIT = 5000
+
+    # Order export (GET /api/orders/export): rows fetched per server-side cursor round trip
+    EXPORT_YIELD_PER = 1000
+
+    # Daily sales rollups behind /api/analytics (rebuild with `flask rebuild-sales-rollups`)
+    SALES_DEFAULT_DAYS = 30  # range served when no dates are given
+    SALES_BACKFILL_CHUNK = 1000  # orders per transaction
+
+    # Stock ledger snapshots (take them periodically with `flask snapshot-stock`)
+    STOCK_SNAPSHOT_BATCH = 500  # products locked per transaction
+
+    # Server-Sent Events at /api/events/stream (per process; each client holds a worker thread,
+    # so only enable it when the server runs threaded or with gevent)
+    SSE_ENABLED = os.environ.get('SSE_ENABLED') == '1'
+    SSE_TICKET_TTL = 30  # seconds a stream ticket stays valid (each is single-use)
+    SSE_MAX_CLIENTS = 200
+    SSE_CLIENT_BUFFER = 256  # undelivered events per client before it is told to refetch
+    SSE_HISTORY = 1000  # recent events kept for Last-Event-ID resume
+    SSE_KEEPALIVE = 15  # seconds between keep-alive comments
+    SSE_RETRY_MS = 3000  # client reconnect delay
+
+    # Per-request SQL instrumentation: query count and DB time, slow queries, likely N+1s
+    SQL_TIMING_HEADERS = os.environ.get('SQL_TIMING_HEADERS') == '1'  # X-Query-Count and Server-Timing (development)
+    SQL_SLOW_QUERY_MS = 200  # statements slower than this are logged
+    SQL_N_PLUS_ONE_THRESHOLD = 10  # runs of one statement in a request that are logged as a likely N+1
+    SQL_STRICT = os.environ.get('SQL_STRICT') == '1'  # fail such requests with a 500 instead (tests)
+
+    # Streamed JSON lists (orjson is used when it is installed)
+    JSON_STREAM_CHUNK = 64 * 1024  # bytes buffered per write
+    JSON_STREAM_YIELD_PER = 500  # rows fetched per round trip by unpaginated lists
+
+    # Response compression (gzip, or brotli when it is installed and accepted)
+    COMPRESS_ENABLED = True
+    COMPRESS_MIN_SIZE = 1024  # bytes; smaller bodies, streamed or not, are sent as they are
+    COMPRESS_LEVEL = 6  # gzip, 1-9
+    COMPRESS_BR_LEVEL = 4  # brotli quality, 0-11
+    COMPRESS_MIMETYPES = (
+        'application/json', 'application/x-ndjson', 'text/csv',
+        'text/html', 'text/css', 'text/javascript', 'application/javascript', 'text/plain', 'image/svg+xml',
+    )
+
+    # Fingerprinted, precompressed frontend assets (build with `flask build-assets`; served from /assets/)
+    ASSETS_BUILD_DIR = os.environ.get('ASSETS_BUILD_DIR') or os.path.join(PROJECT_ROOT, 'build')
+
+    # Image derivatives at /images/<file>?w=&h=&format= (needs Pillow; without it originals are served)
+    IMAGE_DIR = os.environ.get('IMAGE_DIR') or os.path.join(PROJECT_ROOT, 'src', 'images')
+    IMAGE_CACHE_DIR = os.environ.get('IMAGE_CACHE_DIR') or os.path.join(PROJECT_ROOT, 'cache', 'images')
+    IMAGE_CACHE_MAX_BYTES = 256 * 1024 * 1024  # least recently served derivatives are evicted past this
+    IMAGE_MAX_DIMENSION = 2000  # largest w or h a client may ask for
+    IMAGE_QUALITY = 80  # JPEG / WebP encoder quality
+    IMAGE_CACHE_MAX_AGE = 7 * 24 * 3600  # seconds browsers may reuse a derivative without asking
+
+    # Cross-request cache of JWT users (per process; local writes invalidate, the TTL bounds other workers)
+    IDENTITY_CACHE_TTL = 60  # seconds
+    IDENTITY_CACHE_SIZE = 1024  # users
+
+    # Reverse proxies in front of the app (PythonAnywhere, a load balancer: 1) whose
+    # X-Forwarded-For is trusted for the client address; 0 when clients connect directly
+    TRUSTED_PROXY_HOPS = int(os.environ.get('TRUSTED_PROXY_HOPS', 0))
+
+    # Auth rate limits as (attempts, seconds), enforced before any DB or bcrypt work.
+    # RATELIMIT_BACKEND is a RateLimitBackend instance, or the import path of one to build with
+    # its from_config(); the default is per process.
+    RATELIMIT_ENABLED = True
+    RATELIMIT_BACKEND = 'app.ratelimit.MemoryBackend'
+    RATELIMIT_MAX_KEYS = 100000
+    RATELIMIT_LOGIN_PER_IP = (20, 60)
+    RATELIMIT_LOGIN_PER_EMAIL = (5, 60)
+    RATELIMIT_REGISTER_PER_IP = (10, 3600)
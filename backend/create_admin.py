@@ -12,8 +12,8 @@ def create_admin_user():
         existing_user = User.query.filter_by(email=email).first()
         if existing_user:
             print(f"Admin user {email} already exists.")
-            # Update to admin just in case
-            existing_user.is_admin = True
+            # Update to admin just in case (revokes tokens issued under the old role)
+            existing_user.set_admin(True)
             existing_user.set_password(password)
             db.session.commit()
             print("Updated existing user to be Admin with new password.")
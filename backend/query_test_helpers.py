@@ -0,0 +1,59 @@
+"""Shared helpers for the SQL query count regression tests"""
+
+from sqlalchemy import event
+from app import db
+from app.sales import CANCELLED, record_cancellations, record_order
+from app.models import DailyProductSales, User, Product, Order, OrderItem, StockMovement, StockSnapshot
+
+def count_queries(app, client, url, headers):
+    """GET `url` and return (statements run, JSON body); the request must succeed"""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', record)
+    try:
+        response = client.get(url, headers=headers)
+    finally:
+        event.remove(engine, 'before_cursor_execute', record)
+    assert response.status_code == 200, response.get_json()
+    return len(statements), response.get_json()
+
+def add_orders(customer_id, product, count):
+    """Commit `count` one-item Pending orders of `product` for the customer, counted in the sales rollups"""
+    for _ in range(count):
+        order = Order(user_id=customer_id, total_amount=product.price, status='Pending')
+        db.session.add(order)
+        db.session.flush()
+        item = {'product_id': product.id, 'product_name': product.name, 'category': product.category,
+                'quantity': 1, 'price': product.price}
+        db.session.add(OrderItem(order_id=order.id, **item))
+        record_order(order, [item])
+    db.session.commit()
+
+def delete_test_data(user_ids, product_id):
+    """
+    Remove the test's users and product along with their orders and stock ledger rows,
+    taking the orders back out of the sales rollups first.
+    """
+    orders = Order.query.filter(Order.user_id.in_(user_ids)).all()
+    order_ids = [o.id for o in orders]
+    record_cancellations([o.id for o in orders if o.status != CANCELLED])
+    DailyProductSales.query.filter_by(product_id=product_id).delete()
+    StockMovement.query.filter(db.or_(
+        StockMovement.product_id == product_id,
+        StockMovement.order_id.in_(order_ids),
+        StockMovement.user_id.in_(user_ids),
+    )).delete(synchronize_session=False)
+    StockSnapshot.query.filter_by(product_id=product_id).delete()
+    if order_ids:
+        OrderItem.query.filter(OrderItem.order_id.in_(order_ids)).delete(synchronize_session=False)
+        Order.query.filter(Order.id.in_(order_ids)).delete(synchronize_session=False)
+    Product.query.filter_by(id=product_id).delete()
+    # Through the session, so the identity cache forgets them before their ids are reused
+    for user in User.query.filter(User.id.in_(user_ids)):
+        db.session.delete(user)
+    db.session.commit()
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Regression test: the admin order list must run a constant number of SQL queries,
+however many orders exist (no per-order user or item lookups).
+"""
+
+from flask_jwt_extended import create_access_token
+from app import create_app, db
+from app.decorators import access_claims
+from app.models import User, Product
+from query_test_helpers import add_orders, count_queries, delete_test_data
+
+app = create_app()
+app.config['SQL_STRICT'] = True  # any statement looped per row fails the request
+
+def test_admin_order_list_query_count_is_constant():
+    with app.app_context():
+        db.create_all()
+
+        admin = User(full_name="Query Test Admin", email="query-test@admin.com", is_admin=True)
+        admin.set_password("query123")
+        customers = [User(full_name=f"Query Test Customer {i}", email=f"query-test-{i}@customer.com")
+                     for i in range(5)]
+        for customer in customers:
+            customer.set_password("query123")
+        product = Product(name="Query Test Cable", category="Accessories", price=100, stock=0)
+        db.session.add_all([admin, product] + customers)
+        db.session.commit()
+        product_id = product.id
+        customer_ids = [c.id for c in customers]
+        user_ids = [admin.id] + customer_ids
+        token = create_access_token(identity=str(admin.id), additional_claims=access_claims(admin))
+
+    client = app.test_client()
+    headers = {'Authorization': f'Bearer {token}'}
+    # Only look at this test's orders so existing data cannot affect the page contents
+    url = '/api/orders/?user_id={}&limit=50'
+
+    try:
+        with app.app_context():
+            add_orders(customer_ids[0], db.session.get(Product, product_id), 2)
+            add_orders(customer_ids[1], db.session.get(Product, product_id), 40)
+
+        # Warm the identity cache so both measured requests start from the same state
+        client.get(url.format(customer_ids[0]), headers=headers)
+        few, few_page = count_queries(app, client, url.format(customer_ids[0]), headers)
+        many, many_page = count_queries(app, client, url.format(customer_ids[1]), headers)
+
+        print(f"\n✓ {len(few_page['orders'])} orders: {few} queries, "
+              f"{len(many_page['orders'])} orders: {many} queries")
+
+        assert len(many_page['orders']) == 40
+        assert all(len(o['items']) == 1 and o['user_email'] for o in many_page['orders'])
+        assert few == many, "query count grows with the number of orders (N+1)"
+    finally:
+        with app.app_context():
+            delete_test_data(user_ids, product_id)
+
+if __name__ == '__main__':
+    test_admin_order_list_query_count_is_constant()
+    print("\nTEST COMPLETE")
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Test: responses are compressed per Accept-Encoding once they reach COMPRESS_MIN_SIZE,
+streamed or not; compressed ETags turn weak and still answer If-None-Match with a
+304; Server-Sent Events and precompressed assets are passed through untouched.
+"""
+
+import gzip
+import json
+import os
+import shutil
+import tempfile
+from flask import Response, jsonify, request
+from app import create_app
+from app.assets import build
+from app.compression import brotli
+from config import Config
+
+BUILD_ROOT = tempfile.mkdtemp(prefix='compression-test-')
+
+class CompressionConfig(Config):
+    ASSETS_BUILD_DIR = os.path.join(BUILD_ROOT, 'build')
+    SSE_ENABLED = True
+
+app = create_app(CompressionConfig)
+MIN_SIZE = app.config['COMPRESS_MIN_SIZE']
+
+@app.route('/test-compression/json/<int:size>')
+def sized_json(size):
+    response = jsonify({'data': 'x' * size})
+    response.set_etag('catalog-v1')
+    return response.make_conditional(request)
+
+@app.route('/test-compression/stream/<int:size>')
+def sized_stream(size):
+    def generate():
+        # Many small chunks, so the threshold is only reached part way through
+        for _ in range(size // 100):
+            yield 'y' * 100
+        yield 'y' * (size % 100)
+    return Response(generate(), mimetype='text/csv')
+
+def get(url, encoding='gzip', **kwargs):
+    return app.test_client().get(url, headers={'Accept-Encoding': encoding, **kwargs.pop('headers', {})}, **kwargs)
+
+def test_negotiation_and_threshold():
+    big = f'/test-compression/json/{MIN_SIZE * 4}'
+
+    response = get(big)
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in response.vary
+    assert json.loads(gzip.decompress(response.data)) == {'data': 'x' * MIN_SIZE * 4}
+    assert 'Content-Encoding' not in get(big, encoding='identity').headers
+    assert get(big, encoding='br, gzip').headers['Content-Encoding'] == ('br' if brotli else 'gzip')
+    print(f"\n✓ negotiation: gzip, identity, br{'' if brotli else ' (falls back to gzip, brotli not installed)'}")
+
+    assert 'Content-Encoding' not in get('/test-compression/json/10').headers
+    small = get(f'/test-compression/stream/{MIN_SIZE // 2}')
+    assert 'Content-Encoding' not in small.headers and len(small.data) == MIN_SIZE // 2
+    large = get(f'/test-compression/stream/{MIN_SIZE * 8 + 50}')
+    assert large.headers['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(large.data) == b'y' * (MIN_SIZE * 8 + 50)
+    print(f"✓ threshold: small buffered and streamed bodies sent as they are, "
+          f"large stream {len(large.data)} bytes compressed")
+
+def test_weak_etag_and_not_modified():
+    url = f'/test-compression/json/{MIN_SIZE * 4}'
+    response = get(url)
+    assert response.headers['ETag'] == 'W/"catalog-v1"'
+    assert get(url, headers={'If-None-Match': response.headers['ETag']}).status_code == 304
+    assert get(url, encoding='identity', headers={'If-None-Match': '"catalog-v1"'}).status_code == 304
+    print("✓ compressed ETag is weak and still revalidates to 304")
+
+def test_event_stream_and_precompressed_assets_untouched():
+    response = app.test_client().get('/api/events/stream', headers={'Accept-Encoding': 'gzip'}, buffered=False)
+    try:
+        assert response.mimetype == 'text/event-stream'
+        assert 'Content-Encoding' not in response.headers
+        assert next(response.response).startswith(b'retry:')
+    finally:
+        response.close()
+
+    src = os.path.join(BUILD_ROOT, 'src')
+    os.makedirs(os.path.join(src, 'scripts'))
+    script = ('console.log("compression test");\n' * 200).encode()
+    with open(os.path.join(src, 'scripts', 'app.js'), 'wb') as f:
+        f.write(script)
+    manifest = build(src, CompressionConfig.ASSETS_BUILD_DIR)
+    built = os.path.join(CompressionConfig.ASSETS_BUILD_DIR, 'assets', manifest['scripts/app.js'])
+
+    response = get(f"/assets/{manifest['scripts/app.js']}")
+    assert response.headers['Content-Encoding'] == 'gzip'
+    with open(built + '.gz', 'rb') as f:
+        assert response.data == f.read(), "the .gz variant must be sent as built, not compressed again"
+    assert get(f"/assets/{manifest['scripts/app.js']}", encoding='identity').data == script
+    print("✓ event stream and precompressed assets passed through")
+
+def teardown_module(module):
+    shutil.rmtree(BUILD_ROOT, ignore_errors=True)
+
+if __name__ == '__main__':
+    try:
+        test_negotiation_and_threshold()
+        test_weak_etag_and_not_modified()
+        test_event_stream_and_precompressed_assets_untouched()
+    finally:
+        teardown_module(None)
+    print("\nTEST COMPLETE")
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Concurrency test: many customers race for the last units of one product.
+The stock decrement in create_order must never oversell.
+"""
+
+import threading
+from flask_jwt_extended import create_access_token
+from app import create_app, db
+from app.models import User, Product, OrderItem
+from query_test_helpers import delete_test_data
+
+app = create_app()
+
+INITIAL_STOCK = 5
+BUYERS = 20
+
+def test_concurrent_orders_never_oversell():
+    with app.app_context():
+        db.create_all()
+
+        product = Product(name="Race Test Laptop", category="Computers", price=1000, stock=INITIAL_STOCK)
+        product.update_availability()
+        customer = User(full_name="Race Test Customer", email="race-test@customer.com")
+        customer.set_password("race123")
+        db.session.add_all([product, customer])
+        db.session.commit()
+        product_id, customer_id = product.id, customer.id
+        token = create_access_token(identity=str(customer_id))
+
+    results = []
+    start = threading.Barrier(BUYERS)
+
+    def buy():
+        client = app.test_client()
+        start.wait()
+        response = client.post('/api/orders/',
+                               json={'items': [{'id': product_id, 'quantity': 1}]},
+                               headers={'Authorization': f'Bearer {token}'})
+        results.append(response.status_code)
+
+    threads = [threading.Thread(target=buy) for _ in range(BUYERS)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    with app.app_context():
+        try:
+            final_stock = db.session.get(Product, product_id).stock
+            sold = db.session.query(db.func.coalesce(db.func.sum(OrderItem.quantity), 0)) \
+                .filter(OrderItem.product_id == product_id).scalar()
+            placed = results.count(201)
+
+            print(f"\n✓ {BUYERS} buyers, {INITIAL_STOCK} units: {placed} orders placed, "
+                  f"{results.count(400)} refused, final stock {final_stock}")
+
+            assert final_stock >= 0, "stock went negative"
+            assert sold == placed, "every placed order must hold exactly one unit"
+            assert sold + final_stock == INITIAL_STOCK, "units sold and units left must add up"
+            assert placed <= INITIAL_STOCK, "oversold"
+        finally:
+            delete_test_data([customer_id], product_id)
+
+if __name__ == '__main__':
+    test_concurrent_orders_never_oversell()
+    print("\nTEST COMPLETE")
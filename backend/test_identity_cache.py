@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Regression test: bulk UPDATE/DELETE on users (which skip the flush hooks) must clear
+the identity cache, so /me never serves a stale snapshot, even after SQLite reuses a
+deleted user's id.
+"""
+
+from flask_jwt_extended import create_access_token
+from app import create_app, db
+from app.decorators import access_claims
+from app.models import User
+
+app = create_app()
+
+def add_user(email, full_name):
+    user = User(full_name=full_name, email=email)
+    user.set_password("identity123")
+    db.session.add(user)
+    db.session.commit()
+    token = create_access_token(identity=str(user.id), additional_claims=access_claims(user))
+    return user.id, {'Authorization': f'Bearer {token}'}
+
+def test_bulk_writes_clear_identity_cache():
+    with app.app_context():
+        db.create_all()
+        user_id, headers = add_user("identity-test@customer.com", "Identity Test Before")
+    client = app.test_client()
+
+    try:
+        # Cached by the first request
+        assert client.get('/api/auth/me', headers=headers).get_json()['full_name'] == "Identity Test Before"
+
+        with app.app_context():
+            User.query.filter_by(id=user_id).update({'full_name': "Identity Test After"})
+            db.session.commit()
+        assert client.get('/api/auth/me', headers=headers).get_json()['full_name'] == "Identity Test After"
+        print("\n✓ bulk UPDATE: /me shows the new name")
+
+        with app.app_context():
+            User.query.filter_by(id=user_id).delete()
+            db.session.commit()
+        assert client.get('/api/auth/me', headers=headers).status_code in (401, 404)
+
+        with app.app_context():
+            reused_id, reused_headers = add_user("identity-reuse@customer.com", "Identity Test Reused")
+        response = client.get('/api/auth/me', headers=reused_headers)
+        assert response.get_json()['email'] == "identity-reuse@customer.com"
+        print(f"✓ bulk DELETE: id {reused_id} {'reused' if reused_id == user_id else 'not reused'}, no stale identity")
+    finally:
+        with app.app_context():
+            User.query.filter(User.email.in_(["identity-test@customer.com", "identity-reuse@customer.com"])).delete()
+            db.session.commit()
+
+if __name__ == '__main__':
+    test_bulk_writes_clear_identity_cache()
+    print("\nTEST COMPLETE")
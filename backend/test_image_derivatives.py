@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Test: /images validates ?w=&h=&format=, refuses paths outside IMAGE_DIR, serves cached
+derivatives with a long max-age and their digest as ETag, and keeps serving (by
+re-rendering) when the cache evicts a derivative.
+"""
+
+import os
+import shutil
+import tempfile
+from io import BytesIO
+import pytest
+from app import create_app
+from config import Config
+
+IMAGE_ROOT = tempfile.mkdtemp(prefix='image-test-')
+
+class ImageConfig(Config):
+    IMAGE_DIR = os.path.join(IMAGE_ROOT, 'images')
+    IMAGE_CACHE_DIR = os.path.join(IMAGE_ROOT, 'cache')
+    IMAGE_MAX_DIMENSION = 800
+
+os.makedirs(ImageConfig.IMAGE_DIR)
+with open(os.path.join(IMAGE_ROOT, 'secret.txt'), 'w') as f:
+    f.write('outside the image directory')
+
+app = create_app(ImageConfig)
+
+def cached_files():
+    return sorted(os.path.join(d, n) for d, _, names in os.walk(ImageConfig.IMAGE_CACHE_DIR) for n in names)
+
+def test_parameter_validation_and_traversal():
+    client = app.test_client()
+    with open(os.path.join(ImageConfig.IMAGE_DIR, 'logo.svg'), 'w') as f:
+        f.write('<svg xmlns="http://www.w3.org/2000/svg"/>')
+
+    for query in ('w=0', 'w=abc', 'h=-5', 'w=801', 'format=bmp'):
+        response = client.get(f'/images/logo.svg?{query}')
+        assert response.status_code == 400, query
+    print(f"\n✓ bad parameters: 400 ({response.get_json()['message']})")
+
+    for path in ('/images/../secret.txt', '/images/..%2fsecret.txt', '/images/%2e%2e/secret.txt',
+                 '/images/missing.png?w=100'):
+        assert client.get(path).status_code == 404, path
+    print("✓ traversal and missing files: 404")
+
+    # Vector sources are always served as they are
+    assert client.get('/images/logo.svg?w=100').data.startswith(b'<svg')
+
+def test_derivative_cache_and_eviction():
+    Image = pytest.importorskip('PIL.Image')
+    for i, color in enumerate(('red', 'green', 'blue')):
+        Image.new('RGB', (600, 400), color).save(os.path.join(ImageConfig.IMAGE_DIR, f'photo{i}.png'))
+    client = app.test_client()
+    url = '/images/photo{}.png?w=300&format=webp'
+
+    response = client.get(url.format(0))
+    assert response.status_code == 200 and response.mimetype == 'image/webp'
+    assert response.cache_control.max_age == app.config['IMAGE_CACHE_MAX_AGE']
+    with Image.open(BytesIO(response.data)) as image:
+        assert image.size == (300, 200)
+    etag = response.headers['ETag']
+    assert client.get(url.format(0), headers={'If-None-Match': etag}).status_code == 304
+    print(f"✓ derivative: webp 300x200, max-age {response.cache_control.max_age}, 304 on its ETag")
+
+    # Another process evicts the derivative: it is rendered again, not reported as a bad image
+    for path in cached_files():
+        os.remove(path)
+    response = client.get(url.format(0))
+    assert response.status_code == 200 and response.headers['ETag'] == etag
+    assert len(cached_files()) == 1
+
+    # Past the size cap the least recently served derivative goes first
+    digests = [client.get(url.format(i)).headers['ETag'].strip('"') for i in range(3)]
+    largest = max(os.path.getsize(path) for path in cached_files())
+    app.config['IMAGE_CACHE_MAX_BYTES'] = largest * 2 + largest // 2
+    try:
+        assert client.get(url.format(0)).status_code == 200
+        kept = {os.path.basename(path).split('.')[0] for path in cached_files()}
+        assert kept == {digests[0], digests[2]}, "photo1 was the least recently served"
+        assert client.get(url.format(1)).status_code == 200
+    finally:
+        app.config['IMAGE_CACHE_MAX_BYTES'] = Config.IMAGE_CACHE_MAX_BYTES
+    print(f"✓ eviction: least recently served dropped, {len(cached_files())} derivatives kept under the cap")
+
+def teardown_module(module):
+    shutil.rmtree(IMAGE_ROOT, ignore_errors=True)
+
+if __name__ == '__main__':
+    try:
+        test_parameter_validation_and_traversal()
+        test_derivative_cache_and_eviction()
+    finally:
+        teardown_module(None)
+    print("\nTEST COMPLETE")
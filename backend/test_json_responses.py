@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Test: the list endpoints encoded by app/serialization.py (buffered for the product
+and order pages, streamed for the unpaginated user list) send exactly the bytes
+jsonify() did.
+"""
+
+from flask import jsonify
+from flask_jwt_extended import create_access_token
+from app import create_app, db
+from app.decorators import access_claims
+from app.models import User, Product, Order
+from query_test_helpers import add_orders, delete_test_data
+
+app = create_app()
+app.config['SQL_TIMING_HEADERS'] = True
+
+def jsonify_bytes(payload):
+    with app.test_request_context():
+        return jsonify(payload).get_data()
+
+def test_list_bytes_match_jsonify():
+    with app.app_context():
+        db.create_all()
+        admin = User(full_name="JSON Test Admin", email="json-test@admin.com", is_admin=True)
+        admin.set_password("json123")
+        customer = User(full_name="Clémence Ngoïta \U0001F600", email="json-test@customer.com")
+        customer.set_password("json123")
+        products = [Product(name=name, category="JSON Test", price=price, stock=3, specs="2×4 ports")
+                    for name, price in (("Câble réseau", 4500.5), ("Switch 8 ports", 32000), ("Hub \"USB\"", 0.1))]
+        db.session.add_all([admin, customer] + products)
+        db.session.commit()
+        add_orders(customer.id, products[0], 3)
+        customer_id, product_ids = customer.id, [p.id for p in products]
+        user_ids = [admin.id, customer_id]
+        token = create_access_token(identity=str(admin.id), additional_claims=access_claims(admin))
+    client = app.test_client()
+    headers = {'Authorization': f'Bearer {token}'}
+
+    try:
+        with app.app_context():
+            expected_products = jsonify_bytes({
+                'products': [db.session.get(Product, id).to_dict() for id in product_ids],
+                'next_cursor': None,
+            })
+        for attempt in ('miss', 'hit'):
+            response = client.get('/api/products/?category=JSON%20Test')
+            assert response.data == expected_products, attempt
+        print(f"\n✓ products (cache miss and hit): {len(expected_products)} identical bytes")
+
+        response = client.get(f'/api/orders/?user_id={customer_id}', headers=headers)
+        assert 'X-Query-Count' in response.headers, "a buffered page keeps the SQL timing headers"
+        with app.app_context():
+            orders = Order.query.filter_by(user_id=customer_id).order_by(Order.created_at.desc(), Order.id.desc())
+            expected_orders = jsonify_bytes({
+                'orders': [dict(o.to_dict(), user_email="json-test@customer.com",
+                                user_name="Clémence Ngoïta \U0001F600") for o in orders],
+                'next_cursor': None,
+            })
+        assert response.data == expected_orders
+        print(f"✓ orders (buffered page): {len(expected_orders)} identical bytes")
+
+        response = client.get('/api/users/', headers=headers)
+        assert 'X-Query-Count' not in response.headers, "streamed"
+        with app.app_context():
+            expected_users = jsonify_bytes([u.to_dict() for u in User.query.order_by(User.id)])
+        assert response.data == expected_users
+        assert b'Cl\\u00e9mence' in response.data and b'\\ud83d\\ude00' in response.data
+        print(f"✓ users (streamed): {len(expected_users)} identical bytes, non-ASCII escaped")
+    finally:
+        with app.app_context():
+            for product_id in product_ids[1:]:
+                Product.query.filter_by(id=product_id).delete()
+            delete_test_data(user_ids, product_ids[0])
+
+if __name__ == '__main__':
+    test_list_bytes_match_jsonify()
+    print("\nTEST COMPLETE")
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Regression test: "my orders" must be paginated and run a constant number of SQL
+queries per page, however many orders the customer has (no per-order item lookups).
+"""
+
+from flask_jwt_extended import create_access_token
+from app import create_app, db
+from app.decorators import access_claims
+from app.models import User, Product
+from query_test_helpers import add_orders, count_queries, delete_test_data
+
+app = create_app()
+app.config['SQL_STRICT'] = True  # any statement looped per row fails the request
+
+def test_my_orders_query_count_is_constant():
+    with app.app_context():
+        db.create_all()
+
+        customers = [User(full_name=f"History Test Customer {i}", email=f"history-test-{i}@customer.com")
+                     for i in range(2)]
+        for customer in customers:
+            customer.set_password("history123")
+        product = Product(name="History Test Cable", category="Accessories", price=100, stock=0)
+        db.session.add_all([product] + customers)
+        db.session.commit()
+        product_id = product.id
+        user_ids = [c.id for c in customers]
+        tokens = [create_access_token(identity=str(c.id), additional_claims=access_claims(c)) for c in customers]
+
+    client = app.test_client()
+    few_headers, many_headers = ({'Authorization': f'Bearer {token}'} for token in tokens)
+    url = '/api/orders/my-orders?limit=30'
+
+    try:
+        with app.app_context():
+            add_orders(user_ids[0], db.session.get(Product, product_id), 2)
+            add_orders(user_ids[1], db.session.get(Product, product_id), 45)
+
+        # Warm the identity cache so both measured requests start from the same state
+        client.get(url, headers=few_headers)
+        client.get(url, headers=many_headers)
+        few, few_page = count_queries(app, client, url, few_headers)
+        many, many_page = count_queries(app, client, url, many_headers)
+        rest, rest_page = count_queries(app, client, f"{url}&after={many_page['next_cursor']}", many_headers)
+
+        print(f"\n✓ {len(few_page['orders'])} orders: {few} queries, "
+              f"{len(many_page['orders'])} orders: {many} queries, "
+              f"next {len(rest_page['orders'])} orders: {rest} queries")
+
+        assert len(few_page['orders']) == 2 and few_page['next_cursor'] is None
+        assert len(many_page['orders']) == 30 and many_page['next_cursor']
+        assert len(rest_page['orders']) == 15 and rest_page['next_cursor'] is None
+        seen = [o['id'] for o in many_page['orders'] + rest_page['orders']]
+        assert len(set(seen)) == 45, "pages overlap or skip orders"
+        assert all(o['user_id'] == user_ids[1] and len(o['items']) == 1 for o in many_page['orders'])
+        assert few == many == rest, "query count grows with the number of orders (N+1)"
+    finally:
+        with app.app_context():
+            delete_test_data(user_ids, product_id)
+
+if __name__ == '__main__':
+    test_my_orders_query_count_is_constant()
+    print("\nTEST COMPLETE")
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Regression test: cancelling an order takes it out of the category it was counted
+under when placed, even if the product was recategorised in between.
+"""
+
+from flask_jwt_extended import create_access_token
+from app import create_app, db
+from app.decorators import access_claims
+from app.models import User, Product, DailyCategorySales
+from query_test_helpers import delete_test_data
+
+app = create_app()
+
+CATEGORIES = ("Rollup Test Before", "Rollup Test After")
+
+def category_totals():
+    rows = DailyCategorySales.query.filter(DailyCategorySales.category.in_(CATEGORIES))
+    totals = {category: [0, 0, 0.0] for category in CATEGORIES}
+    for row in rows:
+        totals[row.category] = [a + b for a, b in zip(totals[row.category], (row.orders, row.units, row.revenue))]
+    return {category: tuple(total) for category, total in totals.items()}
+
+def test_cancellation_uses_category_at_placement():
+    with app.app_context():
+        db.create_all()
+        admin = User(full_name="Rollup Test Admin", email="rollup-test@admin.com", is_admin=True)
+        admin.set_password("rollup123")
+        product = Product(name="Rollup Test Router", category=CATEGORIES[0], price=250, stock=10)
+        product.update_availability()
+        db.session.add_all([admin, product])
+        db.session.commit()
+        admin_id, product_id = admin.id, product.id
+        token = create_access_token(identity=str(admin_id), additional_claims=access_claims(admin))
+    client = app.test_client()
+    headers = {'Authorization': f'Bearer {token}'}
+
+    try:
+        response = client.post('/api/orders/', json={'items': [{'id': product_id, 'quantity': 2}]}, headers=headers)
+        assert response.status_code == 201, response.get_json()
+        order_id = response.get_json()['order_id']
+        with app.app_context():
+            assert category_totals() == {CATEGORIES[0]: (1, 2, 500.0), CATEGORIES[1]: (0, 0, 0.0)}
+
+        assert client.put(f'/api/products/{product_id}', json={'category': CATEGORIES[1]},
+                          headers=headers).status_code == 200
+        assert client.patch(f'/api/orders/{order_id}/status', json={'status': 'Cancelled'},
+                            headers=headers).status_code == 200
+        with app.app_context():
+            totals = category_totals()
+        assert totals == {CATEGORIES[0]: (0, 0, 0.0), CATEGORIES[1]: (0, 0, 0.0)}, totals
+        print(f"\n✓ recategorised, then cancelled: {totals}")
+    finally:
+        with app.app_context():
+            delete_test_data([admin_id], product_id)
+            DailyCategorySales.query.filter(DailyCategorySales.category.in_(CATEGORIES)).delete()
+            db.session.commit()
+
+if __name__ == '__main__':
+    test_cancellation_uses_category_at_placement()
+    print("\nTEST COMPLETE")
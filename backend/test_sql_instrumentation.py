@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Test: buffered responses report their query count and DB time when enabled, and a
+request that runs the same statement once per row (N+1) is flagged, or fails
+outright in strict mode; a streamed body is checked once it has been sent.
+"""
+
+import pytest
+from flask import jsonify
+from sqlalchemy.orm import selectinload
+from app import create_app, db
+from app.models import User, Product, Order, OrderItem
+from app.serialization import JSONArray, json_stream
+
+app = create_app()
+app.config['SQL_N_PLUS_ONE_THRESHOLD'] = 5
+app.config['SQL_TIMING_HEADERS'] = True
+
+# Two ways to list one customer's orders with their items
+@app.route('/test-sql/lazy/<int:user_id>')
+def lazy_items(user_id):
+    return jsonify([o.to_dict() for o in Order.query.filter_by(user_id=user_id)])
+
+@app.route('/test-sql/batched/<int:user_id>')
+def batched_items(user_id):
+    orders = Order.query.options(selectinload(Order.items)).filter_by(user_id=user_id)
+    return jsonify([o.to_dict() for o in orders])
+
+@app.route('/test-sql/streamed/<int:user_id>')
+def streamed_items(user_id):
+    # Each order's items load lazily while the body is being sent
+    return json_stream(JSONArray(Order.query.filter_by(user_id=user_id), Order.to_dict))
+
+def test_query_stats_and_n_plus_one():
+    with app.app_context():
+        db.create_all()
+        customer = User(full_name="SQL Stats Customer", email="sql-stats@customer.com")
+        customer.set_password("stats123")
+        product = Product(name="SQL Stats Cable", category="Accessories", price=100, stock=0)
+        db.session.add_all([customer, product])
+        db.session.commit()
+        customer_id, product_id = customer.id, product.id
+
+        for _ in range(8):
+            order = Order(user_id=customer_id, total_amount=product.price, status='Pending')
+            db.session.add(order)
+            db.session.flush()
+            db.session.add(OrderItem(order_id=order.id, product_id=product_id, product_name=product.name,
+                                     quantity=1, price=product.price))
+        db.session.commit()
+
+    client = app.test_client()
+    try:
+        response = client.get(f'/test-sql/batched/{customer_id}')
+        assert response.status_code == 200
+        assert response.headers['X-Query-Count'] == '2'
+        assert response.headers['Server-Timing'].startswith('db;dur=')
+        print(f"\n✓ batched: {response.headers['Server-Timing']}")
+
+        app.config['SQL_STRICT'] = False
+        response = client.get(f'/test-sql/lazy/{customer_id}')
+        assert response.status_code == 200, "N+1 should only be logged outside strict mode"
+        assert response.headers['X-Query-Count'] == '9'
+
+        app.config['SQL_STRICT'] = True
+        response = client.get(f'/test-sql/lazy/{customer_id}')
+        assert response.status_code == 500
+        assert 'ran 8 times' in response.get_json()['message']
+        print(f"✓ lazy, strict: {response.get_json()['message'][:60]}...")
+
+        assert client.get(f'/test-sql/batched/{customer_id}').status_code == 200
+
+        # Streamed: no headers, since they go out before the body's queries run
+        app.config['SQL_STRICT'] = False
+        with client.get(f'/test-sql/streamed/{customer_id}') as response:
+            assert response.status_code == 200 and len(response.get_json()) == 8
+            assert 'X-Query-Count' not in response.headers
+
+        app.config['SQL_STRICT'] = True
+        response = client.get(f'/test-sql/streamed/{customer_id}')
+        with pytest.raises(RuntimeError, match='ran 8 times'):
+            response.close()  # what the server does once the body is sent
+        print("✓ streamed, strict: fails once the body has been sent")
+    finally:
+        with app.app_context():
+            order_ids = [o.id for o in Order.query.filter_by(user_id=customer_id)]
+            OrderItem.query.filter(OrderItem.order_id.in_(order_ids)).delete(synchronize_session=False)
+            Order.query.filter(Order.id.in_(order_ids)).delete(synchronize_session=False)
+            Product.query.filter_by(id=product_id).delete()
+            User.query.filter_by(id=customer_id).delete()
+            db.session.commit()
+
+if __name__ == '__main__':
+    test_query_stats_and_n_plus_one()
+    print("\nTEST COMPLETE")
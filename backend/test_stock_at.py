@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Test: /api/inventory/stock-at reports products created since the last snapshot from
+their ledger alone, and snapshots plus later movements for the rest.
+"""
+
+import time
+from datetime import datetime
+from flask_jwt_extended import create_access_token
+from app import create_app, db
+from app.decorators import access_claims
+from app.ledger import take_snapshots
+from app.models import User
+from query_test_helpers import delete_test_data
+
+app = create_app()
+
+def test_stock_at_covers_unsnapshotted_products():
+    with app.app_context():
+        db.create_all()
+        admin = User(full_name="Ledger Test Admin", email="ledger-test@admin.com", is_admin=True)
+        admin.set_password("ledger123")
+        db.session.add(admin)
+        db.session.commit()
+        admin_id = admin.id
+        token = create_access_token(identity=str(admin_id), additional_claims=access_claims(admin))
+    client = app.test_client()
+    headers = {'Authorization': f'Bearer {token}'}
+
+    def stock_at(at, product_id):
+        response = client.get(f'/api/inventory/stock-at?at={at.isoformat()}&product_id={product_id}', headers=headers)
+        assert response.status_code == 200
+        return {row['product_id']: row['stock'] for row in response.get_json()['stock']}
+
+    product_id = None
+    try:
+        before_creation = datetime.utcnow()
+        time.sleep(0.01)
+        response = client.post('/api/products/', headers=headers,
+                               json={'name': "Ledger Test SSD", 'category': "Storage", 'price': 100, 'stock': 12})
+        assert response.status_code == 201, response.get_json()
+        product_id = response.get_json()['product']['id']
+        assert client.patch(f'/api/products/{product_id}/stock', json={'stock': 9},
+                            headers=headers).status_code == 200
+        time.sleep(0.01)
+        unsnapshotted = datetime.utcnow()
+
+        assert stock_at(unsnapshotted, product_id) == {product_id: 9}, "no snapshot yet: summed from the ledger"
+        assert stock_at(before_creation, product_id) == {}, "did not exist yet"
+        print("\n✓ without a snapshot: 9 from its movements, absent before it was created")
+
+        with app.app_context():
+            take_snapshots()
+        assert client.patch(f'/api/products/{product_id}/stock', json={'stock': 4},
+                            headers=headers).status_code == 200
+        time.sleep(0.01)
+        assert stock_at(datetime.utcnow(), product_id) == {product_id: 4}
+        assert stock_at(unsnapshotted, product_id) == {product_id: 9}
+        print("✓ with a snapshot: 4 now, still 9 before the snapshot")
+    finally:
+        with app.app_context():
+            delete_test_data([admin_id], product_id)
+
+if __name__ == '__main__':
+    test_stock_at_covers_unsnapshotted_products()
+    print("\nTEST COMPLETE")
@@ -35,9 +35,10 @@ class ApiClient {
     /**
      * Generic fetch wrapper with enhanced error handling
      */
-    static async request(endpoint, method = 'GET', data = null) {
+    static async request(endpoint, method = 'GET', data = null, extraHeaders = {}) {
         const headers = {
-            'Content-Type': 'application/json'
+            'Content-Type': 'application/json',
+            ...extraHeaders
         };
 
         const token = this.getToken();
@@ -103,16 +104,132 @@ class ApiClient {
         return this.request('/auth/register', 'POST', userData);
     }
 
-    static async getProducts() {
-        return this.request('/products/', 'GET');
+    /**
+     * Fetch one page of products. Returns { products, next_cursor }
+     */
+    static async getProductsPage(params = {}) {
+        const query = new URLSearchParams(params).toString();
+        return this.request(`/products/${query ? '?' + query : ''}`, 'GET');
+    }
+
+    /**
+     * Fetch every product by following the pagination cursors
+     */
+    static async getProducts(params = {}) {
+        let products = [];
+        let cursor = null;
+        do {
+            const page = await this.getProductsPage(cursor ? { ...params, after: cursor } : params);
+            products = products.concat(page.products);
+            cursor = page.next_cursor;
+        } while (cursor);
+        return products;
+    }
+
+    /**
+     * Fetch one page of orders (Admin). Returns { orders, next_cursor }
+     */
+    static async getOrdersPage(params = {}) {
+        const query = new URLSearchParams(params).toString();
+        return this.request(`/orders/${query ? '?' + query : ''}`, 'GET');
     }
 
-    static async getOrders() {
-        return this.request('/orders/', 'GET');
+    /**
+     * Fetch every order matching the filters by following the pagination cursors (Admin)
+     */
+    static async getOrders(params = {}) {
+        let orders = [];
+        let cursor = null;
+        do {
+            const page = await this.getOrdersPage(cursor ? { ...params, after: cursor } : params);
+            orders = orders.concat(page.orders);
+            cursor = page.next_cursor;
+        } while (cursor);
+        return orders;
     }
 
-    static async createOrder(items) {
-        return this.request('/orders/', 'POST', { items });
+    /**
+     * Place an order. Retries of the same checkout must reuse the same key
+     * (see checkoutKey), so the server replays the first result instead of ordering twice.
+     */
+    static async createOrder(items, idempotencyKey) {
+        return this.request('/orders/', 'POST', { items }, { 'Idempotency-Key': idempotencyKey });
+    }
+
+    /**
+     * Idempotency key for checking out these items. It stays the same until the order
+     * goes through (finishCheckout) or the cart changes, even across page reloads.
+     */
+    static checkoutKey(items) {
+        const cart = JSON.stringify(items);
+        const pending = JSON.parse(sessionStorage.getItem('checkout_attempt') || 'null');
+        if (pending && pending.cart === cart) {
+            return pending.key;
+        }
+        const key = this.newIdempotencyKey();
+        sessionStorage.setItem('checkout_attempt', JSON.stringify({ cart, key }));
+        return key;
+    }
+
+    static finishCheckout() {
+        sessionStorage.removeItem('checkout_attempt');
+    }
+
+    /**
+     * Random UUID v4. crypto.randomUUID only exists in secure contexts (HTTPS or
+     * localhost); getRandomValues works over plain HTTP too.
+     */
+    static newIdempotencyKey() {
+        if (crypto.randomUUID) {
+            return crypto.randomUUID();
+        }
+        const bytes = crypto.getRandomValues(new Uint8Array(16));
+        bytes[6] = (bytes[6] & 0x0f) | 0x40;
+        bytes[8] = (bytes[8] & 0x3f) | 0x80;
+        const hex = Array.from(bytes, b => b.toString(16).padStart(2, '0')).join('');
+        return `${hex.slice(0, 8)}-${hex.slice(8, 12)}-${hex.slice(12, 16)}-${hex.slice(16, 20)}-${hex.slice(20)}`;
+    }
+
+    /**
+     * Hold stock for the cart. Send the full cart; quantity 0 drops a hold
+     */
+    static async reserveStock(items) {
+        return this.request('/reservations/', 'POST', { items });
+    }
+
+    /**
+     * Listen for live changes. handlers maps event names (stock, product, order, reset)
+     * to callbacks receiving the parsed data; the browser reconnects and resumes itself
+     */
+    static async openEventStream(handlers) {
+        let source = null;
+        let lastEventId = null;
+        let closed = false;
+        const connect = async () => {
+            // Tickets are single-use, so every (re)connect asks for a new one and
+            // resumes from the last event seen instead of letting EventSource retry
+            const { ticket } = await this.request('/events/ticket', 'POST');
+            const params = new URLSearchParams({ ticket });
+            if (lastEventId) params.set('last_event_id', lastEventId);
+            source = new EventSource(`${API_BASE_URL}/events/stream?${params}`);
+            Object.entries(handlers).forEach(([name, handler]) => {
+                source.addEventListener(name, event => {
+                    lastEventId = event.lastEventId || lastEventId;
+                    handler(JSON.parse(event.data));
+                });
+            });
+            source.onerror = () => {
+                source.close();
+                if (!closed) setTimeout(() => connect().catch(error => console.error('Live updates stopped:', error)), 3000);
+            };
+        };
+        await connect();
+        return {
+            close() {
+                closed = true;
+                source.close();
+            }
+        };
     }
 
     static async createProduct(productData) {
@@ -131,12 +248,50 @@ class ApiClient {
         return this.request(`/products/${productId}/stock`, 'PATCH', { stock });
     }
 
+    /**
+     * Stock health counts and the most urgent low/out-of-stock products (Admin)
+     */
+    static async getInventoryReport(params = {}) {
+        const query = new URLSearchParams(params).toString();
+        return this.request(`/inventory/report${query ? '?' + query : ''}`, 'GET');
+    }
+
+    static async setStockThreshold(threshold) {
+        return this.request('/inventory/thresholds', 'PUT', threshold);
+    }
+
     static async updateOrderStatus(orderId, status) {
         return this.request(`/orders/${orderId}/status`, 'PATCH', { status });
     }
 
-    static async getMyOrders() {
-        return this.request('/orders/my-orders', 'GET');
+    /**
+     * Move many orders at once (Admin): bulkUpdateOrderStatus('Shipped', { ids: [1, 2] })
+     * or bulkUpdateOrderStatus('Shipped', { filter: { status: 'Processing' } })
+     */
+    static async bulkUpdateOrderStatus(status, selection) {
+        return this.request('/orders/status', 'PATCH', { status, ...selection });
+    }
+
+    /**
+     * Fetch one page of the current user's orders, newest first. Returns { orders, next_cursor }
+     */
+    static async getMyOrdersPage(params = {}) {
+        const query = new URLSearchParams(params).toString();
+        return this.request(`/orders/my-orders${query ? '?' + query : ''}`, 'GET');
+    }
+
+    /**
+     * Fetch all of the current user's orders by following the pagination cursors
+     */
+    static async getMyOrders(params = {}) {
+        let orders = [];
+        let cursor = null;
+        do {
+            const page = await this.getMyOrdersPage(cursor ? { ...params, after: cursor } : params);
+            orders = orders.concat(page.orders);
+            cursor = page.next_cursor;
+        } while (cursor);
+        return orders;
     }
 
     static async getUsers() {
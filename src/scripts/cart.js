@@ -195,8 +195,17 @@ window.handleCheckout = async function () {
         console.log("=== SENDING REQUEST TO BACKEND ===");
         console.log("Request data:", { items: orderItems });
 
-        // Step 6: Send to backend
-        const result = await ApiClient.createOrder(orderItems);
+        // Step 6: Send to backend. One key per checkout attempt: a retry (here after a
+        // network failure, or the customer clicking again) replays instead of ordering twice
+        const idempotencyKey = ApiClient.checkoutKey(orderItems);
+        let result;
+        try {
+            result = await ApiClient.createOrder(orderItems, idempotencyKey);
+        } catch (error) {
+            if (!error.message.includes("Cannot connect to server") && !error.message.includes("NetworkError")) throw error;
+            console.warn("Network error, retrying checkout with the same key");
+            result = await ApiClient.createOrder(orderItems, idempotencyKey);
+        }
 
         console.log("=== BACKEND RESPONSE RECEIVED ===");
         console.log("Response:", result);
@@ -210,6 +219,7 @@ window.handleCheckout = async function () {
             alert(`✅ Order Placed Successfully!\n\nOrder ID: #${result.order_id}\nTotal: ${result.total.toLocaleString()} FCFA\n\nThank you for your purchase!`);
 
             // Clear cart
+            ApiClient.finishCheckout();
             saveCart([]);
             renderCart();
 
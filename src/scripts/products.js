@@ -82,16 +82,24 @@ function renderProducts(products, containerId) {
     });
 }
 
+/**
+ * Card-sized WebP derivative of a product image served by the backend's /images route
+ */
+function cardImageUrl(url) {
+    return /^\/?images\//.test(url) ? `${url}?h=400&format=webp` : url;
+}
+
 /**
  * Create a product card element
  */
 function createProductCard(product) {
     const card = document.createElement('div');
     card.className = 'product-card';
+    const image = product.image || product.image_url;
 
     card.innerHTML = `
         <div class="product-image">
-            ${product.image ? `<img src="${product.image}" alt="${product.name}">` : '<i class="fa fa-laptop" style="font-size: 4rem;"></i>'}
+            ${image ? `<img src="${cardImageUrl(image)}" alt="${product.name}" loading="lazy">` : '<i class="fa fa-laptop" style="font-size: 4rem;"></i>'}
         </div>
         <div class="product-info">
             <span class="product-category">${product.category}</span>
@@ -195,6 +203,12 @@ function addToCart(productId) {
         localStorage.setItem('cart', JSON.stringify(cart));
         alert(`✓ ${product.name} added to cart!`);
         console.log('Cart saved successfully. Total items:', cart.length);
+
+        // Hold the units while the user keeps shopping (logged-in users only)
+        if (typeof ApiClient !== 'undefined' && ApiClient.getToken()) {
+            ApiClient.reserveStock(cart.map(item => ({ id: item.id, quantity: item.quantity })))
+                .catch(error => console.warn('Could not reserve stock:', error.message));
+        }
     } catch (error) {
         alert('Error adding to cart. Please try again.');
         console.error('Error saving cart:', error);